@@ -3,25 +3,22 @@ from __future__ import annotations
 import os
 from logging.config import fileConfig
 
-from dotenv import load_dotenv
-from sqlalchemy import engine_from_config
+from sqlalchemy import engine_from_config, event
+from sqlalchemy.engine import Connection
 from sqlalchemy.pool import NullPool
 
 from alembic import context  # type: ignore
 from app.db.database import Base
+from app.db.migrations import DEFAULT_LOCK_TIMEOUT, validate_interval
 from app.models.models import *  # noqa: F403
 
-# Load environment variables from .env file
-print("Current working directory:", os.getcwd())
-load_dotenv(verbose=True)
-print("Environment variables after load_dotenv:")
-print("DATABASE_URL:", os.getenv("DATABASE_URL"))
-print("POSTGRES_HOST:", os.getenv("POSTGRES_HOST"))
-
+# Environment variables from .env are loaded by app.core.config on import.
 config = context.config
 
+# Leave the application's loggers enabled when migrations run in-process, e.g.
+# from the test suite.
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 database_url = os.getenv("DATABASE_URL")
 if database_url is None:
@@ -40,10 +37,36 @@ connectable = engine_from_config(
     poolclass=NullPool,
 )
 
+# Fail fast rather than queue behind long transactions while holding locks that
+# block application traffic; override with `alembic -x lock_timeout=30s upgrade`.
+lock_timeout = validate_interval(
+    context.get_x_argument(as_dictionary=True).get("lock_timeout", DEFAULT_LOCK_TIMEOUT)
+)
+
+
+def limit_lock_waits(connection: Connection) -> None:
+    """Apply ``lock_timeout`` to the transaction about to begin.
+
+    ``SET LOCAL`` is sent straight to the driver, which opens the transaction
+    with it. It has no effect in autocommit blocks, so concurrent index builds,
+    which wait for older transactions rather than for table locks, are not cut
+    short by it and left invalid.
+    """
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+    finally:
+        cursor.close()
+
+
 with connectable.connect() as connection:
+    event.listen(connection, "begin", limit_lock_waits)
+    # One transaction per revision, so revisions that step outside their
+    # transaction (e.g. to build indexes concurrently) only commit themselves.
     context.configure(
         connection=connection,
         target_metadata=target_metadata,
+        transaction_per_migration=True,
     )
     with context.begin_transaction():
         context.run_migrations()
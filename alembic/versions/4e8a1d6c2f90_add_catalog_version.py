@@ -0,0 +1,75 @@
+"""Add catalog version counter.
+
+Revision ID: 4e8a1d6c2f90
+Revises: 9c2f4e1a7b3d
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+from app.db.migrations import execute_with_lock_retry
+
+# revision identifiers, used by Alembic
+revision: str = "4e8a1d6c2f90"
+down_revision: str | None = "9c2f4e1a7b3d"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+CATALOG_TABLES = (
+    "products",
+    "attributes",
+    "attribute_values",
+    "regions",
+    "rental_periods",
+    "product_pricings",
+)
+
+
+def upgrade() -> None:
+    """Create the version counter, the write log and the triggers filling it."""
+    op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO catalog_version (id, version) VALUES (1, 0)")
+    op.create_table(
+        "catalog_writes",
+        sa.Column("txid", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint("txid"),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO catalog_writes (txid) VALUES (txid_current())
+            ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # Creating a trigger briefly locks the table against writes
+    for table in CATALOG_TABLES:
+        execute_with_lock_retry(
+            f"CREATE OR REPLACE TRIGGER {table}_bump_catalog_version "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()"
+        )
+
+
+def downgrade() -> None:
+    """Drop the triggers, the write log and the version counter."""
+    for table in reversed(CATALOG_TABLES):
+        execute_with_lock_retry(
+            f"DROP TRIGGER IF EXISTS {table}_bump_catalog_version ON {table}"
+        )
+    op.execute("DROP FUNCTION IF EXISTS bump_catalog_version()")
+    op.drop_table("catalog_writes")
+    op.drop_table("catalog_version")
@@ -0,0 +1,40 @@
+"""Add indexes on catalog foreign keys.
+
+Revision ID: 9c2f4e1a7b3d
+Revises: 6dec139d40e4
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op  # type: ignore
+from app.db.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic
+revision: str = "9c2f4e1a7b3d"
+down_revision: str | None = "6dec139d40e4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (table, column) pairs joined on by the product queries
+FOREIGN_KEYS = (
+    ("attributes", "product_id"),
+    ("attribute_values", "attribute_id"),
+    ("product_pricings", "product_id"),
+    ("product_pricings", "region_id"),
+    ("product_pricings", "rental_period_id"),
+)
+
+
+def upgrade() -> None:
+    """Index foreign keys concurrently so the tables stay writable."""
+    for table, column in FOREIGN_KEYS:
+        create_index_concurrently(op.f(f"ix_{table}_{column}"), table, [column])
+
+
+def downgrade() -> None:
+    """Drop the foreign key indexes."""
+    for table, column in reversed(FOREIGN_KEYS):
+        drop_index_concurrently(op.f(f"ix_{table}_{column}"), table)
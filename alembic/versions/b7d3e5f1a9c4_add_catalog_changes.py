@@ -0,0 +1,121 @@
+"""Add catalog change log.
+
+Revision ID: b7d3e5f1a9c4
+Revises: 4e8a1d6c2f90
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+from app.db.migrations import backfill_in_batches, execute_with_lock_retry
+
+# revision identifiers, used by Alembic
+revision: str = "b7d3e5f1a9c4"
+down_revision: str | None = "4e8a1d6c2f90"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+CHANGE_TRACKED_TABLES = (
+    "products",
+    "attributes",
+    "attribute_values",
+    "product_pricings",
+)
+
+
+def upgrade() -> None:
+    """Create the change log, its triggers, and seed it with every product."""
+    op.create_table(
+        "catalog_changes",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "txid",
+            sa.BigInteger(),
+            server_default=sa.text("txid_current()"),
+            nullable=False,
+        ),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("change", sa.String(), nullable=False),
+        sa.Column(
+            "changed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_catalog_changes_txid_id", "catalog_changes", ["txid", "id"], unique=False
+    )
+    op.create_table(
+        "catalog_changes_pruned",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("txid", sa.BigInteger(), nullable=False),
+        sa.Column("change_id", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        "INSERT INTO catalog_changes_pruned (id, txid, change_id) VALUES (1, 0, 0)"
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_catalog_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'products' THEN
+                INSERT INTO catalog_changes (product_id, change)
+                VALUES (
+                    coalesce(NEW.id, OLD.id),
+                    CASE TG_OP
+                        WHEN 'INSERT' THEN 'created'
+                        WHEN 'DELETE' THEN 'deleted'
+                        ELSE 'updated'
+                    END
+                );
+            ELSIF TG_TABLE_NAME = 'attribute_values' THEN
+                INSERT INTO catalog_changes (product_id, change)
+                SELECT DISTINCT product_id, 'updated' FROM attributes
+                WHERE id IN (NEW.attribute_id, OLD.attribute_id);
+            ELSE
+                INSERT INTO catalog_changes (product_id, change)
+                SELECT DISTINCT product_id, 'updated'
+                FROM (VALUES (NEW.product_id), (OLD.product_id)) AS t (product_id)
+                WHERE product_id IS NOT NULL;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # Creating a trigger briefly locks the table against writes
+    for table in CHANGE_TRACKED_TABLES:
+        execute_with_lock_retry(
+            f"CREATE OR REPLACE TRIGGER {table}_record_catalog_change "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION record_catalog_change()"
+        )
+
+    # Record existing products as created, so a consumer reading the feed from
+    # the start sees the whole catalog. Products written while this runs may be
+    # recorded twice, which consumers treat like any repeated change.
+    backfill_in_batches(
+        "products",
+        "INSERT INTO catalog_changes (product_id, change) "
+        "SELECT id, 'created' FROM products WHERE id > :lower AND id <= :upper",
+    )
+
+
+def downgrade() -> None:
+    """Drop the triggers and the change log."""
+    for table in reversed(CHANGE_TRACKED_TABLES):
+        execute_with_lock_retry(
+            f"DROP TRIGGER IF EXISTS {table}_record_catalog_change ON {table}"
+        )
+    op.execute("DROP FUNCTION IF EXISTS record_catalog_change()")
+    op.drop_table("catalog_changes_pruned")
+    op.drop_index("ix_catalog_changes_txid_id", table_name="catalog_changes")
+    op.drop_table("catalog_changes")
@@ -0,0 +1,97 @@
+"""Add unique constraints used by bulk upserts.
+
+Revision ID: d2a6f8c0b5e7
+Revises: b7d3e5f1a9c4
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+from app.db.migrations import (
+    backfill_in_batches,
+    create_index_concurrently,
+    execute_with_lock_retry,
+)
+
+# revision identifiers, used by Alembic
+revision: str = "d2a6f8c0b5e7"
+down_revision: str | None = "b7d3e5f1a9c4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (constraint, table, columns)
+UNIQUE_CONSTRAINTS = (
+    (
+        "uq_product_pricings_product_region_period",
+        "product_pricings",
+        ("product_id", "region_id", "rental_period_id"),
+    ),
+    ("uq_attributes_product_name", "attributes", ("product_id", "name")),
+    (
+        "uq_attribute_values_attribute_value",
+        "attribute_values",
+        ("attribute_id", "value"),
+    ),
+)
+
+
+def _constraint_exists(name: str) -> bool:
+    query = sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name")
+    return op.get_bind().execute(query, {"name": name}).first() is not None
+
+
+def upgrade() -> None:
+    """Remove duplicate rows, then add the unique constraints online."""
+    # Keep the most recently inserted price for each product/region/period
+    backfill_in_batches(
+        "product_pricings",
+        "DELETE FROM product_pricings p WHERE p.id > :lower AND p.id <= :upper "
+        "AND EXISTS (SELECT 1 FROM product_pricings q "
+        "WHERE q.product_id = p.product_id AND q.region_id = p.region_id "
+        "AND q.rental_period_id = p.rental_period_id AND q.id > p.id)",
+    )
+    # Merge duplicate attributes into the oldest one with the same name
+    backfill_in_batches(
+        "attributes",
+        "UPDATE attribute_values v SET attribute_id = keep.id "
+        "FROM attributes a, LATERAL (SELECT min(k.id) AS id FROM attributes k "
+        "WHERE k.product_id = a.product_id AND k.name = a.name) keep "
+        "WHERE v.attribute_id = a.id AND keep.id <> a.id "
+        "AND a.id > :lower AND a.id <= :upper",
+    )
+    backfill_in_batches(
+        "attributes",
+        "DELETE FROM attributes a WHERE a.id > :lower AND a.id <= :upper "
+        "AND EXISTS (SELECT 1 FROM attributes k "
+        "WHERE k.product_id = a.product_id AND k.name = a.name AND k.id < a.id)",
+    )
+    backfill_in_batches(
+        "attribute_values",
+        "DELETE FROM attribute_values v WHERE v.id > :lower AND v.id <= :upper "
+        "AND EXISTS (SELECT 1 FROM attribute_values k "
+        "WHERE k.attribute_id = v.attribute_id AND k.value = v.value "
+        "AND k.id < v.id)",
+    )
+
+    # Build each index without blocking writes, then attach it as a constraint,
+    # which only needs a brief lock. A duplicate written by the application
+    # while the index builds makes the build fail; re-running the migration
+    # removes it and retries.
+    for name, table, columns in UNIQUE_CONSTRAINTS:
+        if _constraint_exists(name):
+            continue
+        create_index_concurrently(name, table, columns, unique=True)
+        execute_with_lock_retry(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}"
+        )
+
+
+def downgrade() -> None:
+    """Drop the unique constraints and their indexes."""
+    for name, table, _ in reversed(UNIQUE_CONSTRAINTS):
+        execute_with_lock_retry(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}")
@@ -0,0 +1,195 @@
+"""Partition product_pricings by region.
+
+Revision ID: f3c7a9e1d5b2
+Revises: d2a6f8c0b5e7
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+from app.db.migrations import backfill_in_batches, execute_with_lock_retry
+
+# revision identifiers, used by Alembic
+revision: str = "f3c7a9e1d5b2"
+down_revision: str | None = "d2a6f8c0b5e7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Name of the partitioned table until it replaces product_pricings
+NEW_TABLE = "product_pricings_partitioned"
+
+CATALOG_TRIGGERS = """
+CREATE OR REPLACE TRIGGER product_pricings_bump_catalog_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON product_pricings
+FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+CREATE OR REPLACE TRIGGER product_pricings_record_catalog_change
+AFTER INSERT OR UPDATE OR DELETE ON product_pricings
+FOR EACH ROW EXECUTE FUNCTION record_catalog_change();
+"""
+
+# Keeps the new table in step with writes to the old one while rows are copied.
+# Rows without a region cannot be partitioned (and no endpoint can return
+# them), so they are left behind.
+MIRROR_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION mirror_product_pricings() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM {NEW_TABLE} WHERE id = OLD.id AND region_id = OLD.region_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.region_id IS NOT NULL THEN
+        INSERT INTO {NEW_TABLE}
+            (id, product_id, rental_period_id, region_id, price)
+        VALUES
+            (NEW.id, NEW.product_id, NEW.rental_period_id, NEW.region_id, NEW.price)
+        ON CONFLICT (id, region_id) DO UPDATE SET
+            product_id = excluded.product_id,
+            rental_period_id = excluded.rental_period_id,
+            price = excluded.price;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Move product_pricings into a table list-partitioned on region_id, online.
+
+    A partitioned copy is created, with a partition per existing region and a
+    default one, and kept in sync with the live table by a trigger while
+    existing rows are copied over in batches. The tables are then swapped in one short
+    transaction. Rows being copied are locked ``FOR SHARE``, so a concurrent
+    update or delete waits for the batch and its mirrored change lands after
+    the copy rather than being overwritten by it. If the copy is interrupted,
+    the migration can simply be re-run.
+    """
+    op.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {NEW_TABLE} (
+            id integer NOT NULL DEFAULT nextval('product_pricings_id_seq'),
+            product_id integer,
+            rental_period_id integer,
+            region_id integer NOT NULL,
+            price double precision,
+            CONSTRAINT {NEW_TABLE}_pkey PRIMARY KEY (id, region_id),
+            CONSTRAINT uq_{NEW_TABLE}_product_region_period
+                UNIQUE (product_id, region_id, rental_period_id),
+            CONSTRAINT product_pricings_product_id_fkey
+                FOREIGN KEY (product_id) REFERENCES products (id),
+            CONSTRAINT product_pricings_rental_period_id_fkey
+                FOREIGN KEY (rental_period_id) REFERENCES rental_periods (id),
+            CONSTRAINT product_pricings_region_id_fkey
+                FOREIGN KEY (region_id) REFERENCES regions (id)
+        ) PARTITION BY LIST (region_id)
+        """
+    )
+    # The table is new and unused, so its indexes need no concurrent build
+    for column in ("product_id", "rental_period_id"):
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{NEW_TABLE}_{column} "
+            f"ON {NEW_TABLE} ({column})"
+        )
+
+    # The table is not in use yet, so its partitions can be created in place.
+    # Regions added from here on are priced in the default partition until
+    # app.db.partitions attaches theirs.
+    regions = op.get_bind().execute(sa.text("SELECT id FROM regions")).scalars()
+    for region_id in regions.all():
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS product_pricings_r{int(region_id)} "
+            f"PARTITION OF {NEW_TABLE} FOR VALUES IN ({int(region_id)})"
+        )
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS product_pricings_default "
+        f"PARTITION OF {NEW_TABLE} DEFAULT"
+    )
+
+    op.execute(MIRROR_FUNCTION)
+    execute_with_lock_retry(
+        "CREATE OR REPLACE TRIGGER product_pricings_mirror "
+        "AFTER INSERT OR UPDATE OR DELETE ON product_pricings "
+        "FOR EACH ROW EXECUTE FUNCTION mirror_product_pricings()"
+    )
+
+    backfill_in_batches(
+        "product_pricings",
+        f"INSERT INTO {NEW_TABLE} "
+        "(id, product_id, rental_period_id, region_id, price) "
+        "SELECT id, product_id, rental_period_id, region_id, price "
+        "FROM product_pricings "
+        "WHERE id > :lower AND id <= :upper AND region_id IS NOT NULL "
+        "FOR SHARE ON CONFLICT DO NOTHING",
+    )
+
+    # Only metadata changes from here on, so the exclusive lock is brief. The
+    # old table is dropped with its indexes and triggers (including the mirror
+    # one); the id sequence is handed over to the new table first.
+    execute_with_lock_retry(
+        f"""
+        LOCK TABLE product_pricings, {NEW_TABLE} IN ACCESS EXCLUSIVE MODE;
+        ALTER SEQUENCE product_pricings_id_seq OWNED BY {NEW_TABLE}.id;
+        DROP TABLE product_pricings;
+        ALTER TABLE {NEW_TABLE} RENAME TO product_pricings;
+        ALTER TABLE product_pricings
+            RENAME CONSTRAINT {NEW_TABLE}_pkey TO product_pricings_pkey;
+        ALTER TABLE product_pricings
+            RENAME CONSTRAINT uq_{NEW_TABLE}_product_region_period
+            TO uq_product_pricings_product_region_period;
+        ALTER INDEX ix_{NEW_TABLE}_product_id
+            RENAME TO ix_product_pricings_product_id;
+        ALTER INDEX ix_{NEW_TABLE}_rental_period_id
+            RENAME TO ix_product_pricings_rental_period_id;
+        {CATALOG_TRIGGERS}
+        """
+    )
+    op.execute("DROP FUNCTION mirror_product_pricings()")
+
+
+def downgrade() -> None:
+    """Move product_pricings back into an unpartitioned table.
+
+    Unlike the upgrade this copies the rows while holding an exclusive lock on
+    the table, blocking it for as long as the copy takes.
+    """
+    op.execute(
+        """
+        CREATE TABLE product_pricings_unpartitioned (
+            id integer NOT NULL DEFAULT nextval('product_pricings_id_seq'),
+            product_id integer,
+            rental_period_id integer,
+            region_id integer,
+            price double precision
+        )
+        """
+    )
+    execute_with_lock_retry(
+        f"""
+        LOCK TABLE product_pricings IN ACCESS EXCLUSIVE MODE;
+        INSERT INTO product_pricings_unpartitioned
+            (id, product_id, rental_period_id, region_id, price)
+        SELECT id, product_id, rental_period_id, region_id, price
+        FROM product_pricings;
+        ALTER SEQUENCE product_pricings_id_seq
+            OWNED BY product_pricings_unpartitioned.id;
+        DROP TABLE product_pricings;
+        ALTER TABLE product_pricings_unpartitioned RENAME TO product_pricings;
+        ALTER TABLE product_pricings
+            ADD CONSTRAINT product_pricings_pkey PRIMARY KEY (id),
+            ADD CONSTRAINT uq_product_pricings_product_region_period
+                UNIQUE (product_id, region_id, rental_period_id),
+            ADD FOREIGN KEY (product_id) REFERENCES products (id),
+            ADD FOREIGN KEY (rental_period_id) REFERENCES rental_periods (id),
+            ADD FOREIGN KEY (region_id) REFERENCES regions (id);
+        CREATE INDEX ix_product_pricings_id ON product_pricings (id);
+        CREATE INDEX ix_product_pricings_product_id ON product_pricings (product_id);
+        CREATE INDEX ix_product_pricings_region_id ON product_pricings (region_id);
+        CREATE INDEX ix_product_pricings_rental_period_id
+            ON product_pricings (rental_period_id);
+        {CATALOG_TRIGGERS}
+        """
+    )
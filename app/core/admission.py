@@ -0,0 +1,137 @@
+"""Admission control for database-bound work.
+
+Each worker admits at most ``max_concurrency`` database fetches at a time,
+which is sized to the connection pool so admitted work never waits on
+``SessionLocal`` for a connection. Excess requests wait in a bounded queue for
+at most ``max_wait`` seconds; when the queue is full or the wait expires the
+request is shed immediately with 503 and ``Retry-After``, instead of piling up
+behind a slow database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+
+class AdmissionController:
+    """Bound concurrent database work per worker, shedding load when saturated.
+
+    Attributes:
+        max_concurrency (int): Fetches allowed to run at once.
+        max_queue (int): Requests allowed to wait for a slot.
+        max_wait (float): Seconds a request may wait before it is rejected.
+        retry_after (int): Value of the ``Retry-After`` header on rejection.
+        admitted (int): Requests that were given a slot.
+        queued (int): Requests that had to wait for a slot.
+        rejected (int): Requests rejected because the queue was full.
+        timed_out (int): Requests rejected after waiting ``max_wait`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        max_wait: float,
+        retry_after: int,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._free = max_concurrency
+        self._waiters: deque[asyncio.Future[bool]] = deque()
+
+    @property
+    def active(self) -> int:
+        """Number of fetches currently holding a slot."""
+        return self.max_concurrency - self._free
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests currently queued for a slot."""
+        return len(self._waiters)
+
+    def _overloaded(self) -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail="Service is overloaded, please retry later",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block.
+
+        Raises:
+            HTTPException: 503 if no slot became available in time.
+        """
+        await self._acquire()
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self) -> None:
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise self._overloaded()
+
+        # Slots are handed directly to waiters on release; the timer resolves
+        # the future with False instead, so a slot can never be both granted
+        # and timed out.
+        loop = asyncio.get_running_loop()
+        waiter: asyncio.Future[bool] = loop.create_future()
+        timer = loop.call_later(self.max_wait, _resolve, waiter, False)
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            admitted = await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self._release()
+            raise
+        finally:
+            timer.cancel()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        if not admitted:
+            self.timed_out += 1
+            raise self._overloaded()
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._free += 1
+
+
+def _resolve(waiter: asyncio.Future[bool], admitted: bool) -> None:
+    if not waiter.done():
+        waiter.set_result(admitted)
+
+
+admission_controller = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY
+    or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+)
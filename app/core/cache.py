@@ -0,0 +1,69 @@
+"""Version-validated in-process caching.
+
+Entries are stored together with the catalog version they were computed from
+(see ``CatalogVersion``). A lookup only hits if the caller's current version
+matches, so any committed catalog change invalidates every entry at once
+without explicit purging, and each worker converges independently.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class VersionedCache(Generic[T]):
+    """Bounded LRU cache whose entries are valid for a single version.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that found no entry for the current version.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[int, T]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, version: int) -> T | None:
+        """Return the entry for ``key`` if it was stored at ``version``.
+
+        Args:
+            key (Hashable): Cache key.
+            version (int): Current catalog version.
+
+        Returns:
+            T | None: The cached value, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, value: T) -> None:
+        """Store ``value`` for ``key`` as computed at ``version``.
+
+        Args:
+            key (Hashable): Cache key.
+            version (int): Catalog version the value was computed from.
+            value (T): Value to cache.
+        """
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
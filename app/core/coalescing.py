@@ -0,0 +1,139 @@
+"""Single-flight coalescing of identical concurrent requests.
+
+When many requests ask for the same thing at once, only the first one (the
+leader) runs the fetch; the others await the leader's result instead of
+issuing identical database queries. Nothing is cached: once the shared fetch
+completes, the next request for the key starts a new one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, ClassVar, TypeVar
+
+from app.core.profiling import profiling_active
+
+T = TypeVar("T")
+
+
+class _Call:
+    """An in-flight fetch and the deadlines of the requests waiting on it."""
+
+    def __init__(self, task: asyncio.Future[Any]) -> None:
+        self.task = task
+        self.waiters = 0
+        self.deadlines: list[float] = []
+
+
+class SingleFlight:
+    """Share one in-flight fetch between concurrent callers with the same key.
+
+    If the shared fetch raises, every caller waiting on it receives the same
+    exception and the key is released, so the next caller retries. A caller
+    that is cancelled stops waiting without cancelling the fetch for the
+    others; only when the last waiter is cancelled is the fetch abandoned.
+
+    Attributes:
+        name (str): Name reported in metrics.
+        enabled (bool): When False, every call runs its own fetch.
+        leaders (int): Calls that started a fetch.
+        coalesced (int): Calls that joined a fetch already in flight.
+        failures (int): Shared fetches that raised.
+        abandoned (int): Fetches cancelled because every waiter went away.
+        registry (dict[str, SingleFlight]): Every instance by name, for metrics.
+    """
+
+    registry: ClassVar[dict[str, SingleFlight]] = {}
+
+    def __init__(self, name: str, enabled: bool = True) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.abandoned = 0
+        self._calls: dict[Hashable, _Call] = {}
+        SingleFlight.registry[name] = self
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being fetched."""
+        return len(self._calls)
+
+    def waiters(self, key: Hashable) -> int:
+        """Return how many callers are waiting on the fetch for ``key``."""
+        call = self._calls.get(key)
+        return 0 if call is None else call.waiters
+
+    def deadline(self, key: Hashable) -> float | None:
+        """Return the latest deadline of the callers waiting on ``key``.
+
+        Returns:
+            float | None: A ``time.monotonic()`` timestamp, or None if no
+            caller waiting on ``key`` gave a deadline.
+        """
+        call = self._calls.get(key)
+        return max(call.deadlines) if call is not None and call.deadlines else None
+
+    async def do(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[T]],
+        deadline: float | None = None,
+    ) -> T:
+        """Return the result of ``fetch``, sharing it with concurrent callers.
+
+        Args:
+            key (Hashable): Normalized identity of the request.
+            fetch (Callable[[], Awaitable[T]]): Coroutine factory that performs
+                the fetch; only called by the leader.
+            deadline (float | None): When this caller stops waiting; the fetch
+                can bound itself by the latest one, see ``deadline``.
+
+        Returns:
+            T: The result of the shared fetch.
+        """
+        # A profiled request runs its own fetch, so the profile shows the work
+        # and no other request's fetch is profiled on its behalf.
+        if not self.enabled or profiling_active():
+            return await fetch()
+
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fetch()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call, task))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        if deadline is not None:
+            call.deadlines.append(deadline)
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                self._abandon(key, call)
+            raise
+        finally:
+            call.waiters -= 1
+            if deadline is not None:
+                call.deadlines.remove(deadline)
+
+    def _abandon(self, key: Hashable, call: _Call) -> None:
+        # Release the key first so a new caller starts a fresh fetch instead of
+        # joining one that is being cancelled.
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        call.task.cancel()
+        self.abandoned += 1
+
+    def _finish(self, key: Hashable, call: _Call, task: asyncio.Future[Any]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Retrieve the exception so it is not reported as unhandled when every
+        # waiter was cancelled before the fetch failed.
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
@@ -17,6 +17,53 @@ class Settings(BaseSettings):
         PROJECT_NAME (str): Name of the project.
         BACKEND_CORS_ORIGINS (list[str]): List of allowed CORS origins.
         DEBUG (bool): Debug mode flag.
+        DB_POOL_SIZE (int): Number of persistent connections kept in the pool.
+        DB_MAX_OVERFLOW (int): Extra connections allowed beyond the pool size.
+        STARTUP_WARMUP (bool): Warm mappers, pool and statement cache on startup.
+        STARTUP_WARM_CONNECTIONS (int): Pooled connections to pre-open on startup.
+        CATALOG_SNAPSHOT_PATH (str | None): Snapshot file to serve product reads
+            from; snapshot mode is disabled when unset.
+        CATALOG_SNAPSHOT_CHECK_INTERVAL (float): Seconds between checks for a
+            rebuilt snapshot.
+        CATALOG_SNAPSHOT_MAX_AGE (float | None): Age in seconds after which
+            workers rebuild the snapshot even if the catalog did not change.
+        CATALOG_SNAPSHOT_REFRESH_INTERVAL (float): Seconds between checks
+            whether the catalog changed since the snapshot was built, in which
+            case it is rebuilt.
+        COALESCE_REQUESTS (bool): Share one database fetch between identical
+            concurrent product requests.
+        ADMISSION_MAX_CONCURRENCY (int | None): Concurrent database fetches per
+            worker; defaults to the pool size plus overflow.
+        ADMISSION_MAX_QUEUE (int): Requests allowed to wait for a fetch slot.
+        ADMISSION_MAX_WAIT_SECONDS (float): Longest wait for a slot before 503.
+        ADMISSION_RETRY_AFTER_SECONDS (int): Retry-After sent with a 503.
+        REQUEST_TIMEOUT_MS (int): Default time budget for a request.
+        REQUEST_TIMEOUT_MAX_MS (int): Largest budget a client may ask for with
+            the X-Request-Timeout-Ms header.
+        FACETS_CACHE_SIZE (int): Filter combinations whose facet counts are
+            cached per worker.
+        CHANGE_FEED_RETENTION_HOURS (float): How long change-log entries are
+            kept before the maintenance job prunes them.
+        CATALOG_MAINTENANCE_INTERVAL (float): Seconds between runs of the
+            catalog maintenance in each worker; 0 disables it, in which case it
+            must be run with ``python -m app.db.maintenance`` instead.
+        ADMIN_TOKEN (str | None): Token required in the X-Admin-Token header by
+            privileged endpoints; those endpoints are disabled when unset.
+        BULK_UPSERT_BATCH_SIZE (int): Rows applied per transaction by bulk writes.
+        BULK_UPSERT_MAX_ROWS (int): Largest number of rows of each kind accepted
+            in one bulk write request.
+        PROFILING_ENABLED (bool): Allow admins to profile single requests with
+            the X-Profile header; no profiling code runs when disabled.
+        PROFILING_DIR (str | None): Where request profiles are stored; defaults
+            to a directory in the system temporary directory.
+        PROFILING_KEEP (int): Number of request profiles kept.
+        SLOW_QUERY_LOG_ENABLED (bool): Time statements and log the slow ones.
+        SLOW_QUERY_THRESHOLD_MS (float): Duration above which statements are
+            logged as slow.
+        SLOW_QUERY_EXPLAIN_SAMPLE_RATE (float): Fraction of slow SELECTs re-run
+            with EXPLAIN (ANALYZE, BUFFERS); 0, i.e. off, unless opted in.
+        SLOW_QUERY_PLANS_KEPT (int): Number of captured plans kept per worker.
+        SLOW_QUERY_EXPLAIN_TIMEOUT_MS (int): statement_timeout for each EXPLAIN.
     """
 
     model_config = SettingsConfigDict(
@@ -31,6 +78,8 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_PORT: str = "5432"
     POSTGRES_HOST: str = "localhost"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
 
     # API settings
     API_V1_STR: str = "/api/v1"
@@ -43,5 +92,56 @@ class Settings(BaseSettings):
     # Debug settings
     DEBUG: bool = True
 
+    # Startup settings
+    STARTUP_WARMUP: bool = True
+    STARTUP_WARM_CONNECTIONS: int = 2
+
+    # Catalog snapshot settings
+    CATALOG_SNAPSHOT_PATH: str | None = None
+    CATALOG_SNAPSHOT_CHECK_INTERVAL: float = 1.0
+    CATALOG_SNAPSHOT_MAX_AGE: float | None = None
+    CATALOG_SNAPSHOT_REFRESH_INTERVAL: float = 5.0
+
+    # Request coalescing settings
+    COALESCE_REQUESTS: bool = True
+
+    # Admission control settings
+    ADMISSION_MAX_CONCURRENCY: int | None = None
+    ADMISSION_MAX_QUEUE: int = 100
+    ADMISSION_MAX_WAIT_SECONDS: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Request deadline settings
+    REQUEST_TIMEOUT_MS: int = 10000
+    REQUEST_TIMEOUT_MAX_MS: int = 30000
+
+    # Facet cache settings
+    FACETS_CACHE_SIZE: int = 1024
+
+    # Change feed settings
+    CHANGE_FEED_RETENTION_HOURS: float = 168
+
+    # Catalog maintenance settings
+    CATALOG_MAINTENANCE_INTERVAL: float = 60.0
+
+    # Admin settings
+    ADMIN_TOKEN: str | None = None
+
+    # Bulk write settings
+    BULK_UPSERT_BATCH_SIZE: int = 1000
+    BULK_UPSERT_MAX_ROWS: int = 50000
+
+    # Request profiling settings
+    PROFILING_ENABLED: bool = False
+    PROFILING_DIR: str | None = None
+    PROFILING_KEEP: int = 50
+
+    # Slow query settings
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 500
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0
+    SLOW_QUERY_PLANS_KEPT: int = 100
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 10000
+
 
 settings = Settings()
@@ -0,0 +1,108 @@
+"""Per-request deadlines.
+
+Every request gets a time budget: ``REQUEST_TIMEOUT_MS`` by default, or the
+value of the ``X-Request-Timeout-Ms`` header capped at ``REQUEST_TIMEOUT_MAX_MS``.
+The remaining budget is applied to Postgres as ``SET LOCAL statement_timeout``
+when the request's transaction begins (see ``app.db.database``), and requests
+whose client has gone away are cancelled so their queries stop holding pool
+connections.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable
+from typing import TypeVar
+
+from fastapi import HTTPException, Request
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+# SQLSTATE raised by Postgres when statement_timeout or a cancel request
+# interrupts a query.
+QUERY_CANCELED = "57014"
+
+# How often a running request checks whether its client disconnected.
+DISCONNECT_POLL_INTERVAL = 0.1
+
+
+def request_deadline(request: Request) -> float:
+    """Return the request's deadline on the ``time.monotonic`` clock.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        float: Monotonic time after which the request should be abandoned.
+    """
+    deadline = getattr(request.state, "deadline", None)
+    if deadline is None:
+        timeout_ms = settings.REQUEST_TIMEOUT_MS
+        header = request.headers.get(DEADLINE_HEADER)
+        if header is not None and header.isdigit() and int(header) > 0:
+            timeout_ms = min(int(header), settings.REQUEST_TIMEOUT_MAX_MS)
+        deadline = time.monotonic() + timeout_ms / 1000
+        request.state.deadline = deadline
+    return deadline
+
+
+def remaining_ms(deadline: float) -> int:
+    """Return the whole milliseconds left before ``deadline``, never negative."""
+    return max(int((deadline - time.monotonic()) * 1000), 0)
+
+
+def deadline_exceeded() -> HTTPException:
+    """Build the error returned when a request runs out of time."""
+    return HTTPException(status_code=504, detail="Request deadline exceeded")
+
+
+def is_query_canceled(exc: DBAPIError) -> bool:
+    """Return True if ``exc`` reports a query cancelled by Postgres."""
+    return getattr(exc.orig, "pgcode", None) == QUERY_CANCELED
+
+
+async def until_disconnected(
+    request: Request, awaitable: Awaitable[T], deadline: float | None = None
+) -> T:
+    """Await ``awaitable``, cancelling it if the client disconnects first.
+
+    Args:
+        request (Request): The request whose client is watched.
+        awaitable (Awaitable[T]): The work to run on the request's behalf.
+        deadline (float | None): Monotonic time after which the work is
+            cancelled too, for work whose queries are not bounded by the
+            request's own ``statement_timeout``, such as a shared fetch.
+
+    Returns:
+        T: The result of ``awaitable``.
+
+    Raises:
+        HTTPException: 499 if the client disconnected before completion, or
+            504 if ``deadline`` passed first.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            timeout = DISCONNECT_POLL_INTERVAL
+            if deadline is not None:
+                timeout = min(timeout, max(deadline - time.monotonic(), 0))
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            if deadline is not None and time.monotonic() >= deadline:
+                task.cancel()
+                await asyncio.wait({task})
+                raise deadline_exceeded()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.wait({task})
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,348 @@
+"""Opt-in profiling of individual requests.
+
+When ``PROFILING_ENABLED`` is set, ``ProfilingMiddleware`` profiles requests
+sent with the ``X-Profile: 1`` header by an admin (see ``app.core.security``).
+The request runs under cProfile, both on the event loop and in the worker
+threads it hands database work to, and every SQL statement it executes is
+recorded with its duration. The result is saved to ``PROFILING_DIR``, where
+every worker in the container can serve it from the ``/admin/profiles``
+endpoints; the response carries the profile's ID in ``X-Profile-Id``.
+
+With profiling disabled neither the middleware nor the SQL event listeners are
+installed, so requests pay nothing for it.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, NamedTuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import is_admin
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Functions listed in the text summary of a profile.
+_SUMMARY_LINES = 40
+
+# Longest parameter representation kept per statement.
+_MAX_PARAMETERS_LENGTH = 1000
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_current: ContextVar[RequestProfile | None] = ContextVar(
+    "request_profile", default=None
+)
+
+
+class StatementTiming(NamedTuple):
+    """A SQL statement executed by a profiled request."""
+
+    statement: str
+    parameters: str
+    duration_ms: float
+    thread: str
+
+
+class RequestProfile:
+    """Profile data collected for one request.
+
+    Attributes:
+        id (str): Unique ID of the profile.
+        method (str): HTTP method of the request.
+        path (str): Path and query string of the request.
+        started_at (float): Wall-clock time the request started.
+        statements (list[StatementTiming]): SQL executed, in order.
+    """
+
+    def __init__(self, method: str, path: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.statements: list[StatementTiming] = []
+        self._profilers: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_profiler(self, profiler: cProfile.Profile) -> None:
+        """Merge the data of a profiler that ran on the request's behalf."""
+        with self._lock:
+            self._profilers.append(profiler)
+
+    def record_statement(self, statement: str, parameters: Any, seconds: float) -> None:
+        """Record a SQL statement executed on the request's behalf."""
+        timing = StatementTiming(
+            statement=statement,
+            parameters=repr(parameters)[:_MAX_PARAMETERS_LENGTH],
+            duration_ms=round(seconds * 1000, 3),
+            thread=threading.current_thread().name,
+        )
+        with self._lock:
+            self.statements.append(timing)
+
+    def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """Call ``fn`` under its own profiler, which is added to this profile.
+
+        Before Python 3.12 cProfile only observes the thread that enabled it,
+        so each piece of work handed to a worker thread is profiled separately
+        and merged. From 3.12 only one profiler may be active per process and
+        enabling another raises ``ValueError``; the request's own profiler
+        already observes every thread then, so ``fn`` is simply called.
+        """
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return fn(*args)
+        try:
+            return fn(*args)
+        finally:
+            profiler.disable()
+            self.add_profiler(profiler)
+
+    def stats(self, stream: io.StringIO | None = None) -> pstats.Stats:
+        """Return the merged statistics of every profiler.
+
+        Args:
+            stream (io.StringIO | None): Where reports are printed.
+
+        Returns:
+            pstats.Stats: The combined statistics.
+        """
+        with self._lock:
+            return pstats.Stats(*self._profilers, stream=stream)
+
+
+def profiling_active() -> bool:
+    """Return True if the current request is being profiled."""
+    return _current.get() is not None
+
+
+def in_request_profile(fn: Callable[..., T]) -> Callable[..., T]:
+    """Wrap ``fn`` so that it is profiled if the current request is.
+
+    Intended for work about to be run in a worker thread; when the request is
+    not profiled ``fn`` is returned unchanged.
+
+    Args:
+        fn (Callable[..., T]): The function to run.
+
+    Returns:
+        Callable[..., T]: ``fn`` itself, or a wrapper profiling it.
+    """
+    profile = _current.get()
+    if profile is None:
+        return fn
+    return functools.partial(profile.call, fn)
+
+
+def _before_cursor_execute(conn: Any, *_: Any) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any, _cursor: Any, statement: str, parameters: Any, *_: Any
+) -> None:
+    profile = _current.get()
+    if profile is not None and conn.info.get("profile_start"):
+        started = conn.info["profile_start"].pop()
+        profile.record_statement(statement, parameters, time.perf_counter() - started)
+
+
+def install_sql_listeners(engine: Engine) -> None:
+    """Record SQL executed by profiled requests on ``engine``.
+
+    Args:
+        engine (Engine): The engine to instrument.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfileStore:
+    """Directory of saved request profiles, keeping only the newest ones.
+
+    Each profile is stored as ``<id>.prof``, in the format written by
+    ``pstats.Stats.dump_stats`` (readable by ``pstats``, snakeviz, etc.), and
+    ``<id>.json`` holding the request, its SQL statements and a summary.
+
+    Attributes:
+        directory (Path): Where profiles are stored.
+        keep (int): Number of profiles kept.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], keep: int) -> None:
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, profile: RequestProfile, status_code: int, duration: float) -> None:
+        """Write ``profile`` to the store and drop the oldest profiles.
+
+        Args:
+            profile (RequestProfile): The finished profile.
+            status_code (int): Status code of the response.
+            duration (float): Seconds the request took.
+        """
+        summary = io.StringIO()
+        stats = profile.stats(summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(_SUMMARY_LINES)
+
+        metadata = {
+            "id": profile.id,
+            "method": profile.method,
+            "path": profile.path,
+            "status_code": status_code,
+            "started_at": profile.started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "sql_ms": round(sum(s.duration_ms for s in profile.statements), 3),
+            "statement_count": len(profile.statements),
+            "statements": [s._asdict() for s in profile.statements],
+            "summary": summary.getvalue(),
+        }
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Same format as pstats.Stats.dump_stats
+        self._write(f"{profile.id}.prof", marshal.dumps(stats.stats))  # type: ignore
+        self._write(f"{profile.id}.json", json.dumps(metadata).encode())
+        self._prune()
+
+    def _write(self, name: str, data: bytes) -> None:
+        tmp = self.directory / f".{name}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, self.directory / name)
+
+    def _prune(self) -> None:
+        saved = sorted(
+            self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime
+        )
+        for path in saved[: max(len(saved) - self.keep, 0)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".prof").unlink(missing_ok=True)
+
+    def list(self) -> list[dict[str, Any]]:
+        """Return the metadata of stored profiles, newest first, without SQL."""
+        profiles = []
+        for path in self.directory.glob("*.json"):
+            try:
+                metadata = json.loads(path.read_bytes())
+            except (OSError, ValueError):
+                continue  # pruned or being replaced meanwhile
+            del metadata["statements"], metadata["summary"]
+            profiles.append(metadata)
+        return sorted(profiles, key=lambda p: p["started_at"], reverse=True)
+
+    def load(self, profile_id: str) -> dict[str, Any] | None:
+        """Return the metadata of a profile, or None if it is not stored."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            return json.loads((self.directory / f"{profile_id}.json").read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def stats_path(self, profile_id: str) -> Path | None:
+        """Return the path of a profile's pstats file, or None if not stored."""
+        path = self.directory / f"{profile_id}.prof"
+        if not _PROFILE_ID.match(profile_id) or not path.exists():
+            return None
+        return path
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that ask for it.
+
+    cProfile can only run one profiler per thread (per process from Python
+    3.12), so while one request is being profiled, other requests asking for
+    a profile are served without one, as are requests arriving while another
+    profiler is active. Event-loop work of concurrent requests on the same
+    worker is included in the profile; work in worker threads is not before
+    Python 3.12.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore) -> None:
+        self.app = app
+        self.store = store
+        self._busy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or self._busy
+            or Headers(scope=scope).get(PROFILE_HEADER) != "1"
+            or not is_admin(Request(scope))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            logger.warning("Another profiler is active, serving request unprofiled")
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if scope.get("query_string"):
+            path = f"{path}?{scope['query_string'].decode('latin-1')}"
+        profile = RequestProfile(scope["method"], path)
+        status_code = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile.id)
+            await send(message)
+
+        self._busy = True
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                profiler.disable()
+                profile.add_profiler(profiler)
+        finally:
+            _current.reset(token)
+            self._busy = False
+            duration = time.perf_counter() - started
+            try:
+                await run_in_threadpool(self.store.save, profile, status_code, duration)
+            except OSError:
+                logger.exception("Saving profile %s failed", profile.id)
+
+
+profile_store = ProfileStore(
+    settings.PROFILING_DIR or Path(tempfile.gettempdir()) / "cinch-profiles",
+    settings.PROFILING_KEEP,
+)
@@ -0,0 +1,44 @@
+"""Access control for privileged endpoints.
+
+Endpoints that write to the catalog or expose internals require the
+``X-Admin-Token`` header to match ``ADMIN_TOKEN``. When no token is configured
+those endpoints are disabled altogether.
+"""
+
+from __future__ import annotations
+
+import secrets
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def is_admin(request: Request) -> bool:
+    """Return True if the request carries the configured admin token.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        bool: Whether the request is privileged.
+    """
+    token = request.headers.get(ADMIN_TOKEN_HEADER)
+    if settings.ADMIN_TOKEN is None or token is None:
+        return False
+    return secrets.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+def require_admin_token(request: Request) -> None:
+    """Dependency rejecting requests without the admin token.
+
+    Args:
+        request (Request): The incoming request.
+
+    Raises:
+        HTTPException: 403 if the token is missing, wrong, or not configured.
+    """
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,402 @@
+"""Set-based bulk writes of catalog pricings and attributes.
+
+Rows are applied in batches of ``batch_size``, each in its own transaction, so a
+large request never holds locks for long and a failing batch only affects its
+own rows. Every batch is written with a fixed number of statements: the rows
+are passed as one array per column and expanded with ``unnest``, so the SQL is
+the same whatever the batch size and stays in SQLAlchemy's compiled cache.
+Within a batch, rows are written in key order so that concurrent bulk writers
+lock rows in the same order rather than deadlocking.
+
+Every row gets an outcome: ``created``, ``updated``, ``unchanged``,
+``superseded`` (a later row in the same request has the same key and wins) or
+``failed`` with a reason.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from typing import Any, NamedTuple
+
+from sqlalchemy import (
+    Float,
+    Integer,
+    String,
+    Table,
+    and_,
+    any_,
+    bindparam,
+    cast,
+    delete,
+    exists,
+    func,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import ReturningDelete, ReturningInsert
+from sqlalchemy.sql.elements import Cast
+from sqlalchemy.sql.selectable import Select, TableValuedAlias
+from sqlalchemy.types import TypeEngine
+
+from app.core.deadlines import is_query_canceled
+from app.db.database import Base
+from app.models.models import (
+    Attribute,
+    AttributeValue,
+    Product,
+    ProductPricing,
+    Region,
+    RentalPeriod,
+)
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+SUPERSEDED = "superseded"
+FAILED = "failed"
+
+
+class PricingRow(NamedTuple):
+    """Price of a product for a region and rental period."""
+
+    sku: str
+    region: str
+    rental_period: int
+    price: float
+
+
+class AttributeRow(NamedTuple):
+    """Complete set of values of one product attribute."""
+
+    sku: str
+    name: str
+    values: Sequence[str]
+
+
+class Outcome(NamedTuple):
+    """Result of applying one row."""
+
+    status: str
+    detail: str | None = None
+
+
+def _table(model: type[Base]) -> Table:
+    """Return the table ``model`` is mapped to, which the stubs type loosely."""
+    table = model.__table__
+    assert isinstance(table, Table)
+    return table
+
+
+def _array(name: str, type_: type[TypeEngine[Any]]) -> Cast[Sequence[Any]]:
+    """Return a bound array parameter, cast so that empty arrays are typed too."""
+    return cast(bindparam(name), ARRAY(type_))
+
+
+def _unnest(**columns: type[TypeEngine[Any]]) -> TableValuedAlias:
+    """Return a table of bound array parameters zipped together by ``unnest``."""
+    arrays = [_array(name, type_) for name, type_ in columns.items()]
+    return func.unnest(*arrays).table_valued(*columns).render_derived()
+
+
+def _pricing_upsert_stmt() -> ReturningInsert[tuple[int, int, int]]:
+    source = _unnest(
+        product_id=Integer, region_id=Integer, rental_period_id=Integer, price=Float
+    )
+    stmt = insert(_table(ProductPricing)).from_select(
+        ["product_id", "region_id", "rental_period_id", "price"],
+        select(
+            source.c.product_id,
+            source.c.region_id,
+            source.c.rental_period_id,
+            source.c.price,
+        ),
+    )
+    # Rows whose price is already current are left alone, so they neither
+    # churn the table nor show up in the change feed.
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product_id", "region_id", "rental_period_id"],
+        set_={"price": stmt.excluded.price},
+        where=ProductPricing.price.is_distinct_from(stmt.excluded.price),
+    )
+    return stmt.returning(
+        ProductPricing.product_id,
+        ProductPricing.region_id,
+        ProductPricing.rental_period_id,
+    )
+
+
+def _pricing_lookup_stmt() -> Select[tuple[int, int, int]]:
+    # Partitioned tables cannot return system columns such as xmax, so rows
+    # that already exist are looked up before the upsert to tell inserts from
+    # updates.
+    source = _unnest(product_id=Integer, region_id=Integer, rental_period_id=Integer)
+    return select(
+        ProductPricing.product_id,
+        ProductPricing.region_id,
+        ProductPricing.rental_period_id,
+    ).join(
+        source,
+        and_(
+            ProductPricing.product_id == source.c.product_id,
+            ProductPricing.region_id == source.c.region_id,
+            ProductPricing.rental_period_id == source.c.rental_period_id,
+        ),
+    )
+
+
+def _attribute_insert_stmt() -> ReturningInsert[tuple[int, str]]:
+    source = _unnest(product_id=Integer, name=String)
+    return (
+        insert(_table(Attribute))
+        .from_select(["product_id", "name"], select(source.c.product_id, source.c.name))
+        .on_conflict_do_nothing(index_elements=["product_id", "name"])
+        .returning(Attribute.product_id, Attribute.name)
+    )
+
+
+def _attribute_lookup_stmt() -> Select[tuple[int, int, str]]:
+    source = _unnest(product_id=Integer, name=String)
+    return select(Attribute.id, Attribute.product_id, Attribute.name).join(
+        source,
+        and_(
+            Attribute.product_id == source.c.product_id,
+            Attribute.name == source.c.name,
+        ),
+    )
+
+
+def _stale_values_delete_stmt() -> ReturningDelete[tuple[int]]:
+    desired = _unnest(value_attribute_id=Integer, value=String)
+    return (
+        delete(_table(AttributeValue))
+        .where(AttributeValue.attribute_id == any_(_array("attribute_ids", Integer)))
+        .where(
+            ~exists().where(
+                desired.c.value_attribute_id == AttributeValue.attribute_id,
+                desired.c.value == AttributeValue.value,
+            )
+        )
+        .returning(AttributeValue.attribute_id)
+    )
+
+
+def _values_insert_stmt() -> ReturningInsert[tuple[int]]:
+    desired = _unnest(value_attribute_id=Integer, value=String)
+    return (
+        insert(_table(AttributeValue))
+        .from_select(
+            ["attribute_id", "value"],
+            select(desired.c.value_attribute_id, desired.c.value),
+        )
+        .on_conflict_do_nothing(index_elements=["attribute_id", "value"])
+        .returning(AttributeValue.attribute_id)
+    )
+
+
+PRICING_UPSERT = _pricing_upsert_stmt()
+PRICING_LOOKUP = _pricing_lookup_stmt()
+ATTRIBUTE_INSERT = _attribute_insert_stmt()
+ATTRIBUTE_LOOKUP = _attribute_lookup_stmt()
+STALE_VALUES_DELETE = _stale_values_delete_stmt()
+VALUES_INSERT = _values_insert_stmt()
+
+
+def _latest_rows(keys: Sequence[tuple]) -> tuple[list[int], dict[int, Outcome]]:
+    """Split rows into the last one for each key and the superseded others.
+
+    Returns:
+        tuple[list[int], dict[int, Outcome]]: Indexes of the rows to apply,
+            and the outcomes of the superseded rows.
+    """
+    latest: dict[tuple, int] = {}
+    superseded: dict[int, Outcome] = {}
+    for index, key in enumerate(keys):
+        if key in latest:
+            superseded[latest[key]] = Outcome(SUPERSEDED, f"Superseded by row {index}")
+        latest[key] = index
+    return sorted(latest.values()), superseded
+
+
+def _lookup(db: Session, key: Any, column: Any, values: set) -> dict:
+    """Map ``key`` values to ``column`` for the rows matching ``values``."""
+    rows = db.execute(select(key, column).filter(key.in_(values))).tuples().all()
+    return dict(rows)
+
+
+def _apply_batches(
+    db: Session,
+    rows: Sequence[Any],
+    indexes: list[int],
+    batch_size: int,
+    apply: Callable[[Session, Any, list[int]], dict[int, Outcome]],
+) -> dict[int, Outcome]:
+    """Apply ``indexes`` of ``rows`` in committed batches, returning outcomes.
+
+    A failed batch is rolled back and its rows marked failed. If the request's
+    deadline cancelled the batch, the remaining rows are not attempted.
+    """
+    outcomes: dict[int, Outcome] = {}
+    for position in range(0, len(indexes), batch_size):
+        batch = indexes[position : position + batch_size]
+        try:
+            result = apply(db, rows, batch)
+            db.commit()
+        except DBAPIError as exc:
+            db.rollback()
+            if is_query_canceled(exc):
+                reason = "Request deadline exceeded"
+                outcomes.update(
+                    dict.fromkeys(indexes[position:], Outcome(FAILED, reason))
+                )
+                break
+            reason = str(exc.orig).splitlines()[0]
+            outcomes.update(dict.fromkeys(batch, Outcome(FAILED, reason)))
+        else:
+            outcomes.update(result)
+    return outcomes
+
+
+def _apply_pricing_batch(
+    db: Session, rows: Sequence[PricingRow], batch: list[int]
+) -> dict[int, Outcome]:
+    products = _lookup(db, Product.sku, Product.id, {rows[i].sku for i in batch})
+    regions = _lookup(db, Region.name, Region.id, {rows[i].region for i in batch})
+    periods = _lookup(
+        db,
+        RentalPeriod.duration_months,
+        RentalPeriod.id,
+        {rows[i].rental_period for i in batch},
+    )
+
+    result: dict[int, Outcome] = {}
+    keyed: dict[tuple[int, int, int], int] = {}
+    for index in batch:
+        row = rows[index]
+        if row.sku not in products:
+            result[index] = Outcome(FAILED, f"Unknown sku {row.sku!r}")
+        elif row.region not in regions:
+            result[index] = Outcome(FAILED, f"Unknown region {row.region!r}")
+        elif row.rental_period not in periods:
+            result[index] = Outcome(
+                FAILED, f"Unknown rental period {row.rental_period!r}"
+            )
+        else:
+            key = (products[row.sku], regions[row.region], periods[row.rental_period])
+            keyed[key] = index
+    if not keyed:
+        return result
+
+    keys = sorted(keyed)
+    params = {
+        "product_id": [key[0] for key in keys],
+        "region_id": [key[1] for key in keys],
+        "rental_period_id": [key[2] for key in keys],
+    }
+    existing = set(db.execute(PRICING_LOOKUP, params).tuples())
+    written = db.execute(
+        PRICING_UPSERT, {**params, "price": [rows[keyed[key]].price for key in keys]}
+    )
+    for key in written.tuples():
+        index = keyed.pop(key)
+        result[index] = Outcome(UPDATED if key in existing else CREATED)
+    for index in keyed.values():
+        result[index] = Outcome(UNCHANGED)
+    return result
+
+
+def _apply_attribute_batch(
+    db: Session, rows: Sequence[AttributeRow], batch: list[int]
+) -> dict[int, Outcome]:
+    products = _lookup(db, Product.sku, Product.id, {rows[i].sku for i in batch})
+
+    result: dict[int, Outcome] = {}
+    keyed: dict[tuple[int, str], int] = {}
+    for index in batch:
+        row = rows[index]
+        if row.sku not in products:
+            result[index] = Outcome(FAILED, f"Unknown sku {row.sku!r}")
+        else:
+            keyed[(products[row.sku], row.name)] = index
+    if not keyed:
+        return result
+
+    keys = sorted(keyed)
+    params = {
+        "product_id": [key[0] for key in keys],
+        "name": [key[1] for key in keys],
+    }
+    created = set(db.execute(ATTRIBUTE_INSERT, params).tuples())
+    attribute_ids = {
+        (row.product_id, row.name): row.id
+        for row in db.execute(ATTRIBUTE_LOOKUP, params)
+    }
+
+    desired = sorted(
+        (attribute_ids[key], value)
+        for key, index in keyed.items()
+        for value in set(rows[index].values)
+    )
+    values = {
+        "attribute_ids": sorted(attribute_ids.values()),
+        "value_attribute_id": [pair[0] for pair in desired],
+        "value": [pair[1] for pair in desired],
+    }
+    changed = {row.attribute_id for row in db.execute(STALE_VALUES_DELETE, values)}
+    changed.update(row.attribute_id for row in db.execute(VALUES_INSERT, values))
+
+    for key, index in keyed.items():
+        if key in created:
+            result[index] = Outcome(CREATED)
+        elif attribute_ids[key] in changed:
+            result[index] = Outcome(UPDATED)
+        else:
+            result[index] = Outcome(UNCHANGED)
+    return result
+
+
+def upsert_pricings(
+    db: Session, rows: Sequence[PricingRow], batch_size: int
+) -> list[Outcome]:
+    """Insert or update product prices.
+
+    Products, regions and rental periods are looked up by SKU, name and
+    duration; rows referring to unknown ones fail.
+
+    Args:
+        db (Session): Session to write with; committed after every batch.
+        rows (Sequence[PricingRow]): Prices to write.
+        batch_size (int): Rows applied per transaction.
+
+    Returns:
+        list[Outcome]: The outcome of each row, in input order.
+    """
+    pending, outcomes = _latest_rows(
+        [(row.sku, row.region, row.rental_period) for row in rows]
+    )
+    outcomes.update(_apply_batches(db, rows, pending, batch_size, _apply_pricing_batch))
+    return [outcomes[index] for index in range(len(rows))]
+
+
+def upsert_attributes(
+    db: Session, rows: Sequence[AttributeRow], batch_size: int
+) -> list[Outcome]:
+    """Create attributes or replace their values.
+
+    After a row is applied, the product's attribute has exactly the given
+    values; the attribute is created if the product does not have it yet.
+
+    Args:
+        db (Session): Session to write with; committed after every batch.
+        rows (Sequence[AttributeRow]): Attribute values to write.
+        batch_size (int): Rows applied per transaction.
+
+    Returns:
+        list[Outcome]: The outcome of each row, in input order.
+    """
+    pending, outcomes = _latest_rows([(row.sku, row.name) for row in rows])
+    outcomes.update(
+        _apply_batches(db, rows, pending, batch_size, _apply_attribute_batch)
+    )
+    return [outcomes[index] for index in range(len(rows))]
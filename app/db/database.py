@@ -1,9 +1,16 @@
+import threading
 from collections.abc import Generator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.orm import DeclarativeBase, Session, SessionTransaction, sessionmaker
+from sqlalchemy.pool import ConnectionPoolEntry, Pool
 
 from app.core.config import settings
+from app.core.deadlines import remaining_ms, request_deadline
+from app.db.slow_queries import slow_query_log
 
 
 class Base(DeclarativeBase):
@@ -13,13 +20,92 @@ class Base(DeclarativeBase):
 
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if settings.SLOW_QUERY_LOG_ENABLED:
+    slow_query_log.install(engine)
 
-def get_db() -> Generator[Session, None, None]:
+# Guards the raw connections remembered for cancellation: a connection is
+# forgotten under it before it goes back to the pool, and only cancelled under
+# it, so a cancel can never reach a connection another session checked out.
+_cancel_lock = threading.Lock()
+
+
+def session_deadline(session: Session) -> float | None:
+    """Return the deadline bounding the session's statements.
+
+    ``session.info["deadline"]`` is either a ``time.monotonic()`` timestamp or
+    a callable returning one when asked, for sessions whose deadline can move
+    while they wait for a connection, such as coalesced fetches.
+
+    Args:
+        session (Session): The session.
+
+    Returns:
+        float | None: The deadline, or None if the session has none.
+    """
+    deadline = session.info.get("deadline")
+    return deadline() if callable(deadline) else deadline
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def apply_statement_timeout(
+    session: Session, transaction: SessionTransaction, connection: Connection
+) -> None:
+    """Bound the transaction's statements by the request's remaining budget.
+
+    The timeout is computed when the transaction begins, i.e. when a pooled
+    connection is actually acquired, so time spent queueing is accounted for.
+    The raw connection is remembered until it goes back to the pool, so the
+    query can be cancelled if the client disconnects, and the route is
+    attached to the connection for the slow-query log.
+    """
+    with _cancel_lock:
+        session.info["dbapi_connection"] = connection.connection.dbapi_connection
+    connection.info["session_info"] = session.info
+    connection.info["route"] = session.info.get("route")
+    deadline = session_deadline(session)
+    if deadline is not None:
+        # A zero statement_timeout disables the limit, so never go below 1ms.
+        timeout_ms = max(remaining_ms(deadline), 1)
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+
+@event.listens_for(Pool, "checkin")
+def forget_connection(
+    dbapi_connection: DBAPIConnection | None, connection_record: ConnectionPoolEntry
+) -> None:
+    """Drop the session's raw connection before it is returned to the pool."""
+    session_info = connection_record.info.pop("session_info", None)
+    if session_info is not None:
+        with _cancel_lock:
+            session_info.pop("dbapi_connection", None)
+
+
+def cancel_query(session: Session) -> None:
+    """Ask Postgres to cancel the statement the session is currently running.
+
+    Args:
+        session (Session): Session whose in-flight statement should stop.
+    """
+    with _cancel_lock:
+        dbapi_connection = session.info.get("dbapi_connection")
+        if dbapi_connection is not None:
+            dbapi_connection.cancel()
+
+
+def get_db(request: Request) -> Generator[Session, None, None]:
     """Get a database session.
 
+    Args:
+        request (Request): The incoming request, whose deadline bounds the
+            session's statements and whose route is reported for slow ones.
+
     Yields:
         Session: A SQLAlchemy database session.
 
@@ -27,7 +113,13 @@ def get_db() -> Generator[Session, None, None]:
         This function is intended to be used as a FastAPI dependency.
         The session is automatically closed when the request is complete.
     """
-    db = SessionLocal()
+    route = request.scope.get("route")
+    db = SessionLocal(
+        info={
+            "deadline": request_deadline(request),
+            "route": f"{request.method} {getattr(route, 'path', request.url.path)}",
+        }
+    )
     try:
         yield db
     finally:
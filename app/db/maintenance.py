@@ -0,0 +1,165 @@
+"""Periodic catalog maintenance.
+
+Every worker runs it every ``CATALOG_MAINTENANCE_INTERVAL`` seconds (see
+``app.main``), one process at a time. It can also be run from cron or a
+scheduled job instead::
+
+    python -m app.db.maintenance
+
+``compact_catalog_writes`` folds the catalog writes logged by the version
+triggers into the ``catalog_version`` counter, so reading the catalog version
+(see ``catalog_version_stmt``) only ever counts a short log.
+
+``prune_catalog_changes`` deletes change-log entries older than
+``CHANGE_FEED_RETENTION_HOURS`` and records the last pruned cursor in
+``catalog_changes_pruned``; the feed rejects cursors before it with 410 Gone.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Key of the advisory lock held while maintenance runs, so concurrent workers
+# skip the run instead of queueing behind each other's deletes.
+MAINTENANCE_LOCK_KEY = 0x63696E6368
+
+# Deleting the log entries and adding their count to the counter in one
+# statement keeps the catalog version unchanged for every reader. Entries
+# committed after the statement started are left for the next run.
+COMPACT_CATALOG_WRITES = text(
+    "WITH compacted AS (DELETE FROM catalog_writes RETURNING txid) "
+    "UPDATE catalog_version "
+    "SET version = version + (SELECT count(*) FROM compacted) "
+    "WHERE id = 1 "
+    "RETURNING (SELECT count(*) FROM compacted)"
+)
+
+
+# The first entry that must be kept, in feed order: one inside the retention
+# window, or one whose transaction may not have finished yet, as entries of
+# such a transaction may still appear before entries already read.
+FIRST_RETAINED_CHANGE = text(
+    "SELECT txid, id FROM catalog_changes "
+    "WHERE changed_at >= now() - :retention "
+    "OR txid >= txid_snapshot_xmin(txid_current_snapshot()) "
+    "ORDER BY txid, id LIMIT 1"
+)
+
+CHANGE_HORIZON = text("SELECT txid_snapshot_xmin(txid_current_snapshot()), 0")
+
+# Deleting a batch and moving the pruned cursor past it in one statement means
+# a reader never sees entries missing without also seeing the new cursor.
+PRUNE_CATALOG_CHANGES = text(
+    "WITH pruned AS ("
+    "DELETE FROM catalog_changes WHERE (txid, id) IN ("
+    "SELECT txid, id FROM catalog_changes WHERE (txid, id) < (:txid, :id) "
+    "ORDER BY txid, id LIMIT :batch_size) "
+    "RETURNING txid, id), "
+    "last AS (SELECT txid, id FROM pruned ORDER BY txid DESC, id DESC LIMIT 1) "
+    "UPDATE catalog_changes_pruned "
+    "SET txid = last.txid, change_id = last.id FROM last "
+    "WHERE catalog_changes_pruned.id = 1 "
+    "RETURNING (SELECT count(*) FROM pruned)"
+)
+
+
+def compact_catalog_writes(connection: Connection) -> int:
+    """Fold the logged catalog writes into the catalog version counter.
+
+    Args:
+        connection (Connection): Connection to run on; must not be in a
+            transaction.
+
+    Returns:
+        int: Number of log entries compacted.
+    """
+    with connection.begin():
+        return connection.execute(COMPACT_CATALOG_WRITES).scalar_one()
+
+
+def prune_catalog_changes(
+    connection: Connection, retention: timedelta, batch_size: int = 10_000
+) -> int:
+    """Delete the change-log entries that fell out of the retention window.
+
+    Only a prefix of the log in feed order is deleted, up to the first entry
+    that must be kept, so the pruned cursor tells readers exactly which
+    cursors are gone. Each batch is committed on its own.
+
+    Args:
+        connection (Connection): Connection to run on; must not be in a
+            transaction.
+        retention (timedelta): How long entries are kept.
+        batch_size (int): Entries deleted per transaction.
+
+    Returns:
+        int: Number of entries deleted.
+    """
+    with connection.begin():
+        boundary = (
+            connection.execute(FIRST_RETAINED_CHANGE, {"retention": retention}).first()
+            or connection.execute(CHANGE_HORIZON).one()
+        )
+    txid, change_id = boundary
+
+    pruned = 0
+    while True:
+        with connection.begin():
+            deleted = (
+                connection.execute(
+                    PRUNE_CATALOG_CHANGES,
+                    {"txid": txid, "id": change_id, "batch_size": batch_size},
+                ).scalar()
+                or 0
+            )
+        pruned += deleted
+        if deleted < batch_size:
+            return pruned
+
+
+def run_maintenance(engine: Engine) -> bool:
+    """Compact the catalog write log and prune the change log.
+
+    Nothing is done while another process runs the maintenance.
+
+    Args:
+        engine (Engine): Engine to take a connection from.
+
+    Returns:
+        bool: Whether the maintenance ran.
+    """
+    params = {"key": MAINTENANCE_LOCK_KEY}
+    with engine.connect() as connection:
+        locked = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), params
+        ).scalar_one()
+        connection.commit()
+        if not locked:
+            return False
+        try:
+            compacted = compact_catalog_writes(connection)
+            retention = timedelta(hours=settings.CHANGE_FEED_RETENTION_HOURS)
+            pruned = prune_catalog_changes(connection, retention)
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), params)
+            connection.commit()
+    if compacted or pruned:
+        logger.info(
+            "Compacted %d catalog writes, pruned %d catalog changes", compacted, pruned
+        )
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not run_maintenance(engine):
+        raise SystemExit("Another process is already running the maintenance")
@@ -0,0 +1,347 @@
+"""Helpers for migrating large catalog tables without blocking traffic.
+
+``alembic upgrade`` normally runs a revision inside one transaction, so a plain
+``CREATE INDEX`` or a full-table ``UPDATE`` holds locks on tables such as
+``product_pricings`` for as long as it takes to process every row. The helpers
+here are meant to be called from revision scripts instead:
+
+* ``create_index_concurrently`` / ``drop_index_concurrently`` build and drop
+  indexes outside the transaction without blocking writes, retrying failed
+  builds so that no invalid index is left behind.
+* ``backfill_in_batches`` / ``update_in_batches`` process a table in keyset
+  ranges, each committed on its own, with throttling and progress logging.
+* ``lock_timeout`` and ``execute_with_lock_retry`` make DDL that needs a brief
+  exclusive lock give up quickly, rather than queueing behind a long-running
+  transaction while every other query queues behind it.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from alembic import op  # type: ignore
+
+T = TypeVar("T")
+
+# Log through Alembic's own logger so progress shows up next to its output.
+logger = logging.getLogger("alembic.runtime.migration")
+
+DEFAULT_LOCK_TIMEOUT = "5s"
+
+# SQLSTATE raised when lock_timeout expires.
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Seconds between backfill progress log lines.
+_PROGRESS_INTERVAL = 5.0
+
+_INTERVAL = re.compile(r"^\d+(us|ms|s|min|h)?$")
+
+
+def validate_interval(value: str) -> str:
+    """Check that ``value`` is a Postgres duration such as ``500ms`` or ``5s``.
+
+    Durations are interpolated into ``SET`` statements, which do not accept
+    bind parameters.
+
+    Args:
+        value (str): The duration to check.
+
+    Returns:
+        str: The unchanged duration.
+
+    Raises:
+        ValueError: If ``value`` is not a plain duration.
+    """
+    if not _INTERVAL.match(value):
+        raise ValueError(f"Invalid duration: {value!r}")
+    return value
+
+
+def _retry_on_lock_timeout(
+    run: Callable[[], T], attempts: int = 5, backoff: float = 1.0
+) -> T:
+    """Call ``run``, retrying with exponential backoff while locks are busy."""
+    attempt = 1
+    while True:
+        try:
+            return run()
+        except OperationalError as exc:
+            lock_busy = getattr(exc.orig, "pgcode", None) == LOCK_NOT_AVAILABLE
+            if not lock_busy or attempt == attempts:
+                raise
+            logger.warning(
+                "Lock not available (attempt %d/%d), retrying in %.1fs",
+                attempt,
+                attempts,
+                backoff,
+            )
+            time.sleep(backoff)
+            backoff *= 2
+            attempt += 1
+
+
+@contextmanager
+def lock_timeout(timeout: str = DEFAULT_LOCK_TIMEOUT) -> Iterator[None]:
+    """Limit how long statements in the block may wait for a lock.
+
+    The setting applies to the session, for blocks running outside a
+    transaction such as ``autocommit_block``; it is restored even if the block
+    raises.
+
+    Args:
+        timeout (str): Postgres duration, e.g. ``"2s"``.
+    """
+    bind = op.get_bind()
+    previous = bind.exec_driver_sql("SHOW lock_timeout").scalar()
+    bind.exec_driver_sql(f"SET lock_timeout = '{validate_interval(timeout)}'")
+    try:
+        yield
+    finally:
+        bind.exec_driver_sql(f"SET lock_timeout = '{previous}'")
+
+
+def execute_with_lock_retry(
+    statement: str,
+    timeout: str = "2s",
+    attempts: int = 5,
+    backoff: float = 1.0,
+) -> None:
+    """Run DDL that needs an exclusive lock, retrying if the lock is busy.
+
+    Each attempt runs in a savepoint with a short ``lock_timeout``, so a
+    failed attempt neither aborts the migration's transaction nor leaves
+    application queries queued behind it. The timeout is set with ``SET
+    LOCAL`` inside the savepoint and only applies to ``statement``.
+
+    Args:
+        statement (str): The SQL to execute.
+        timeout (str): Lock wait allowed per attempt.
+        attempts (int): Number of attempts before giving up.
+        backoff (float): Seconds to sleep after the first failure, doubled
+            after every further failure.
+
+    Raises:
+        OperationalError: If the lock could not be acquired in any attempt.
+    """
+    bind = op.get_bind()
+    timeout = validate_interval(timeout)
+    previous = bind.exec_driver_sql("SHOW lock_timeout").scalar()
+
+    def attempt() -> None:
+        # A failed attempt rolls its SET LOCAL back with the savepoint; a
+        # successful one restores the migration's own timeout.
+        with bind.begin_nested():
+            bind.exec_driver_sql(f"SET LOCAL lock_timeout = '{timeout}'")
+            bind.exec_driver_sql(statement)
+            bind.exec_driver_sql(f"SET LOCAL lock_timeout = '{previous}'")
+
+    _retry_on_lock_timeout(attempt, attempts, backoff)
+
+
+def _drop_invalid_index(index_name: str, table_name: str) -> None:
+    """Drop ``index_name`` if a failed concurrent build left it invalid."""
+    invalid = op.get_bind().execute(
+        text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": index_name},
+    )
+    if invalid.first() is not None:
+        logger.info("Dropping invalid index %s left by a failed build", index_name)
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def create_index_concurrently(  # noqa: PLR0913
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str],
+    unique: bool = False,
+    *,
+    attempts: int = 3,
+    backoff: float = 5.0,
+    **kw: Any,
+) -> None:
+    """Build an index with ``CREATE INDEX CONCURRENTLY``.
+
+    The build runs outside the migration's transaction, so reads and writes
+    continue while it runs. It waits for every transaction older than itself,
+    so no ``lock_timeout`` applies to it. A failed build leaves an invalid
+    index behind, which is dropped before the build is retried; after the
+    last attempt it is dropped too, so the migration can simply be re-run.
+
+    Args:
+        index_name (str): Name of the index.
+        table_name (str): Table to index.
+        columns (Sequence[str]): Indexed columns.
+        unique (bool): Whether to build a unique index.
+        attempts (int): Number of builds attempted before giving up.
+        backoff (float): Seconds to sleep after the first failure, doubled
+            after every further failure.
+        **kw: Extra arguments passed to ``op.create_index``.
+
+    Raises:
+        OperationalError: If every attempt failed.
+    """
+    with op.get_context().autocommit_block(), lock_timeout("0"):
+        attempt = 1
+        while True:
+            _drop_invalid_index(index_name, table_name)
+            try:
+                op.create_index(
+                    index_name,
+                    table_name,
+                    list(columns),
+                    unique=unique,
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                    **kw,
+                )
+                return
+            except OperationalError:
+                if attempt == attempts:
+                    _drop_invalid_index(index_name, table_name)
+                    raise
+                logger.warning(
+                    "Building index %s failed (attempt %d/%d), retrying in %.1fs",
+                    index_name,
+                    attempt,
+                    attempts,
+                    backoff,
+                    exc_info=True,
+                )
+                time.sleep(backoff)
+                backoff *= 2
+                attempt += 1
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """Drop an index with ``DROP INDEX CONCURRENTLY``.
+
+    Args:
+        index_name (str): Name of the index.
+        table_name (str): Table the index belongs to.
+    """
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def backfill_in_batches(  # noqa: PLR0913
+    table_name: str,
+    statement: str,
+    *,
+    key: str = "id",
+    batch_size: int = 10_000,
+    pause: float = 0.05,
+    timeout: str = "2s",
+) -> int:
+    """Run ``statement`` over ``table_name`` one keyset range at a time.
+
+    ``statement`` must restrict itself to rows with ``key > :lower AND
+    key <= :upper``. Each range is committed on its own so locks are held only
+    briefly and replicas keep up; ``pause`` seconds are slept between ranges to
+    leave headroom for application traffic. The ranges cover the keys present
+    when the backfill starts; rows added later are expected to be written
+    correctly by the application.
+
+    Args:
+        table_name (str): Table whose key range is walked.
+        statement (str): SQL to execute for each range.
+        key (str): Monotonic integer key column, usually the primary key.
+        batch_size (int): Width of each key range.
+        pause (float): Seconds to sleep between ranges.
+        timeout (str): Lock wait allowed per range.
+
+    Returns:
+        int: Total number of rows affected.
+    """
+    with op.get_context().autocommit_block(), lock_timeout(timeout):
+        bind = op.get_bind()
+        lowest, highest = bind.exec_driver_sql(
+            f"SELECT min({key}), max({key}) FROM {table_name}"
+        ).one()
+        if lowest is None:
+            logger.info("Backfill of %s: table is empty", table_name)
+            return 0
+
+        def run_range(lower: int, upper: int) -> int:
+            params = {"lower": lower, "upper": upper}
+            return bind.execute(text(statement), params).rowcount
+
+        started = logged = time.monotonic()
+        lower = lowest - 1
+        total = 0
+        while lower < highest:
+            upper = min(lower + batch_size, highest)
+            total += _retry_on_lock_timeout(partial(run_range, lower, upper))
+            lower = upper
+
+            now = time.monotonic()
+            if now - logged >= _PROGRESS_INTERVAL or lower >= highest:
+                logged = now
+                logger.info(
+                    "Backfill of %s: %.1f%% (%d rows, %.0f rows/s)",
+                    table_name,
+                    100 * (upper - lowest + 1) / (highest - lowest + 1),
+                    total,
+                    total / max(now - started, 1e-9),
+                )
+            if lower < highest:
+                time.sleep(pause)
+        return total
+
+
+def update_in_batches(  # noqa: PLR0913
+    table_name: str,
+    set_clause: str,
+    where: str | None = None,
+    *,
+    key: str = "id",
+    batch_size: int = 10_000,
+    pause: float = 0.05,
+    timeout: str = "2s",
+) -> int:
+    """Apply ``UPDATE table SET set_clause`` in committed keyset batches.
+
+    Args:
+        table_name (str): Table to update.
+        set_clause (str): SQL assignments, e.g. ``"price = round(price)"``.
+        where (str | None): Optional extra condition limiting updated rows.
+        key (str): Monotonic integer key column, usually the primary key.
+        batch_size (int): Width of each key range.
+        pause (float): Seconds to sleep between ranges.
+        timeout (str): Lock wait allowed per range.
+
+    Returns:
+        int: Total number of rows updated.
+    """
+    condition = f"{key} > :lower AND {key} <= :upper"
+    if where is not None:
+        condition = f"{condition} AND ({where})"
+    return backfill_in_batches(
+        table_name,
+        f"UPDATE {table_name} SET {set_clause} WHERE {condition}",
+        key=key,
+        batch_size=batch_size,
+        pause=pause,
+        timeout=timeout,
+    )
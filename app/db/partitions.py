@@ -0,0 +1,135 @@
+"""Per-region partitions of ``product_pricings``.
+
+``product_pricings`` is list-partitioned on ``region_id``. Pricings of a region
+that has no partition of its own land in ``product_pricings_default``, so a
+region can be added, and priced, without any DDL. Its partition is split out
+afterwards by an admin step, e.g. after deploys or from cron::
+
+    python -m app.db.partitions
+
+``CREATE TABLE ... PARTITION OF`` would lock ``product_pricings`` against every
+read and write until its transaction commits. Instead each partition is created
+as a standalone table carrying the partition constraint, filled with the
+region's rows from the default partition, and attached with ``ATTACH
+PARTITION``, which only needs a lock that lets reads and writes of the other
+partitions carry on. Writes to the default partition wait while a region's rows
+are moved. The moved rows are recorded in the change feed as updates of their
+products.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.db.database import engine
+from app.db.migrations import validate_interval
+
+logger = logging.getLogger(__name__)
+
+PRICING_COLUMNS = "id, product_id, rental_period_id, region_id, price"
+
+
+def partition_name(region_id: int) -> str:
+    """Return the name of the ``product_pricings`` partition of a region."""
+    return f"product_pricings_r{int(region_id)}"
+
+
+def regions_without_partition(connection: Connection) -> list[int]:
+    """Return the IDs of the regions whose pricings are in the default partition.
+
+    Args:
+        connection (Connection): Connection to query with.
+
+    Returns:
+        list[int]: Region IDs, in ascending order.
+    """
+    return list(
+        connection.execute(
+            text(
+                "SELECT id FROM regions "
+                "WHERE to_regclass('product_pricings_r' || id) IS NULL "
+                "ORDER BY id"
+            )
+        ).scalars()
+    )
+
+
+def attach_region_partition(
+    connection: Connection, region_id: int, lock_timeout: str = "2s"
+) -> None:
+    """Create the partition of a region and move its pricings into it.
+
+    Runs in a transaction of its own, in which every lock wait is limited to
+    ``lock_timeout``; if a lock is not granted in time nothing is changed and
+    the step can simply be re-run.
+
+    Args:
+        connection (Connection): Connection to run on; must not be in a
+            transaction.
+        region_id (int): ID of the region.
+        lock_timeout (str): Postgres duration allowed for each lock wait.
+    """
+    region_id = int(region_id)
+    name = partition_name(region_id)
+    with connection.begin():
+        connection.exec_driver_sql(
+            f"SET LOCAL lock_timeout = '{validate_interval(lock_timeout)}'"
+        )
+        # Keep writers from adding rows of the region to the default partition
+        # between moving its rows and attaching the new partition.
+        connection.exec_driver_sql(
+            "LOCK TABLE product_pricings_default IN EXCLUSIVE MODE"
+        )
+        # The CHECK constraint matches the partition bound, which spares
+        # ATTACH PARTITION a scan of the new table.
+        connection.exec_driver_sql(
+            f"CREATE TABLE {name} "
+            "(LIKE product_pricings INCLUDING DEFAULTS INCLUDING CONSTRAINTS, "
+            f"CONSTRAINT {name}_region_id_check CHECK (region_id = {region_id}))"
+        )
+        connection.exec_driver_sql(
+            "WITH moved AS ("
+            f"DELETE FROM product_pricings_default WHERE region_id = {region_id} "
+            f"RETURNING {PRICING_COLUMNS}) "
+            f"INSERT INTO {name} ({PRICING_COLUMNS}) "
+            f"SELECT {PRICING_COLUMNS} FROM moved"
+        )
+        connection.exec_driver_sql(
+            f"ALTER TABLE product_pricings ATTACH PARTITION {name} "
+            f"FOR VALUES IN ({region_id})"
+        )
+        connection.exec_driver_sql(
+            f"ALTER TABLE {name} DROP CONSTRAINT {name}_region_id_check"
+        )
+    logger.info("Attached pricing partition %s", name)
+
+
+def attach_missing_partitions(
+    connection: Connection, lock_timeout: str = "2s"
+) -> list[int]:
+    """Attach a partition for every region that does not have one yet.
+
+    Args:
+        connection (Connection): Connection to run on; must not be in a
+            transaction.
+        lock_timeout (str): Postgres duration allowed for each lock wait.
+
+    Returns:
+        list[int]: IDs of the regions whose partitions were attached.
+    """
+    region_ids = regions_without_partition(connection)
+    connection.commit()
+    for region_id in region_ids:
+        attach_region_partition(connection, region_id, lock_timeout)
+    return region_ids
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with engine.connect() as conn:
+        attached = attach_missing_partitions(conn)
+    if not attached:
+        logger.info("Every region already has a pricing partition")
@@ -0,0 +1,273 @@
+"""Reusable catalog query builders.
+
+Statements are built here rather than inline in the routers so that the
+request handlers and the startup warm-up compile exactly the same SQL, which
+lets SQLAlchemy's compiled statement cache be populated before traffic arrives.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from sqlalchemy import (
+    CompoundSelect,
+    Select,
+    distinct,
+    func,
+    literal,
+    null,
+    select,
+    true,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.models.models import (
+    Attribute,
+    AttributeValue,
+    CatalogChange,
+    CatalogChangesPruned,
+    CatalogVersion,
+    CatalogWrite,
+    Product,
+    ProductPricing,
+    Region,
+    RentalPeriod,
+)
+
+
+def _eager_load_options() -> tuple[LoaderOption, ...]:
+    """Return loader options for a product with its full attribute/pricing tree."""
+    return (
+        joinedload(Product.attributes).joinedload(Attribute.values),
+        joinedload(Product.pricings).joinedload(ProductPricing.rental_period),
+        joinedload(Product.pricings).joinedload(ProductPricing.region),
+    )
+
+
+def _apply_filters(
+    stmt: Select, region: str | None, rental_period: int | None
+) -> Select:
+    """Restrict a statement over products to the given region/rental period."""
+    if region is None and rental_period is None:
+        return stmt
+
+    stmt = stmt.join(ProductPricing)
+    if region is not None:
+        # Comparing the partition key with the region's ID, rather than joining
+        # regions on its name, lets Postgres skip the other regions' partitions
+        # once the subquery has run.
+        region_id = select(Region.id).filter(Region.name == region).scalar_subquery()
+        stmt = stmt.filter(ProductPricing.region_id == region_id)
+    if rental_period is not None:
+        stmt = stmt.join(RentalPeriod).filter(
+            RentalPeriod.duration_months == rental_period
+        )
+    return stmt
+
+
+def product_detail_stmt(product_id: int) -> Select:
+    """Build the eager-loading statement for a single product.
+
+    Args:
+        product_id (int): The ID of the product to load.
+
+    Returns:
+        Select: Statement selecting the product with attributes and pricings.
+    """
+    return (
+        select(Product).options(*_eager_load_options()).filter(Product.id == product_id)
+    )
+
+
+def product_list_stmt(
+    region: str | None, rental_period: int | None, offset: int, limit: int
+) -> Select:
+    """Build the eager-loading statement for a page of products.
+
+    The page is selected in a subquery, so a region filter only reads that
+    region's pricing partition. The pricings eager-loaded for the page are
+    not filtered, as each product is listed with its prices in every region;
+    they are looked up by product in every partition.
+
+    Args:
+        region (str | None): Optional region name filter.
+        rental_period (int | None): Optional rental period filter in months.
+        offset (int): Number of rows to skip.
+        limit (int): Maximum number of rows to return.
+
+    Returns:
+        Select: Statement selecting the requested page of products.
+    """
+    stmt = select(Product).options(*_eager_load_options())
+    stmt = _apply_filters(stmt, region, rental_period)
+    return stmt.offset(offset).limit(limit)
+
+
+def product_count_stmt(region: str | None, rental_period: int | None) -> Select:
+    """Build the statement used to count products matching the filters.
+
+    Args:
+        region (str | None): Optional region name filter.
+        rental_period (int | None): Optional rental period filter in months.
+
+    Returns:
+        Select: Statement selecting the matching products.
+    """
+    return _apply_filters(select(Product), region, rental_period)
+
+
+def products_by_id_stmt(product_ids: Sequence[int]) -> Select:
+    """Build the eager-loading statement for a set of products.
+
+    Args:
+        product_ids (Sequence[int]): IDs of the products to load.
+
+    Returns:
+        Select: Statement selecting the products with attributes and pricings.
+    """
+    return (
+        select(Product)
+        .options(*_eager_load_options())
+        .filter(Product.id.in_(product_ids))
+    )
+
+
+def product_changes_stmt(after: tuple[int, int], limit: int) -> Select:
+    """Build the keyset-paginated statement reading the catalog change log.
+
+    Entries are read in ``(txid, id)`` order and only from transactions older
+    than the oldest one still running. Sequence values are handed out before
+    commit, so reading in plain ``id`` order could skip an entry committed
+    after a later one had already been read; every transaction below that
+    horizon has finished, so no entry can appear behind the cursor. A
+    long-running transaction delays the feed rather than losing changes.
+
+    Args:
+        after (tuple[int, int]): ``(txid, id)`` of the last entry already read.
+        limit (int): Maximum number of entries to return.
+
+    Returns:
+        Select: Statement selecting the next change-log entries.
+    """
+    horizon = func.txid_snapshot_xmin(func.txid_current_snapshot())
+    return (
+        select(
+            CatalogChange.txid,
+            CatalogChange.id,
+            CatalogChange.product_id,
+            CatalogChange.change,
+        )
+        .filter(tuple_(CatalogChange.txid, CatalogChange.id) > after)
+        .filter(CatalogChange.txid < horizon)
+        .order_by(CatalogChange.txid, CatalogChange.id)
+        .limit(limit)
+    )
+
+
+def changes_pruned_through_stmt() -> Select:
+    """Build the statement reading the cursor up to which the change log is pruned.
+
+    Returns:
+        Select: Statement selecting ``(txid, change_id)`` of the last pruned entry.
+    """
+    return select(CatalogChangesPruned.txid, CatalogChangesPruned.change_id).filter(
+        CatalogChangesPruned.id == 1
+    )
+
+
+def catalog_version_stmt() -> Select:
+    """Build the statement reading the current catalog version.
+
+    The version is the number of committed catalog-modifying transactions: the
+    compacted count plus the writes logged since. Compaction moves writes from
+    one to the other in a single transaction, so the sum never changes.
+
+    Returns:
+        Select: Statement selecting the catalog version.
+    """
+    pending = select(func.count()).select_from(CatalogWrite).scalar_subquery()
+    return select(CatalogVersion.version + pending).filter(CatalogVersion.id == 1)
+
+
+def product_facets_stmt(
+    region: str | None, rental_period: int | None
+) -> CompoundSelect:
+    """Build the single statement counting products per facet value.
+
+    Region and rental period counts come from pricings grouped by two grouping
+    sets; attribute value counts come from attribute values on their own, and
+    the two are combined with ``UNION ALL``. Aggregating each side separately
+    keeps a product's pricings from being multiplied by its attribute values.
+    Each facet is counted with every filter except its own, so selecting a
+    region still reports how many products the other regions have.
+    ``region_set`` and ``period_set`` are 0 in rows belonging to the region and
+    rental period sets respectively, and both are 1 in attribute rows.
+
+    Args:
+        region (str | None): Optional region name filter.
+        rental_period (int | None): Optional rental period filter in months.
+
+    Returns:
+        CompoundSelect: Statement yielding one row per facet value.
+    """
+    region_match = true() if region is None else Region.name == region
+    period_match = (
+        true()
+        if rental_period is None
+        else RentalPeriod.duration_months == rental_period
+    )
+    product_count = func.count(distinct(ProductPricing.product_id))
+
+    pricing_facets = (
+        select(
+            func.grouping(Region.name).label("region_set"),
+            func.grouping(RentalPeriod.duration_months).label("period_set"),
+            Region.name.label("region"),
+            RentalPeriod.duration_months.label("rental_period"),
+            null().label("attribute"),
+            null().label("value"),
+            product_count.filter(period_match).label("region_count"),
+            product_count.filter(region_match).label("period_count"),
+            null().label("attribute_count"),
+        )
+        .select_from(ProductPricing)
+        .join(Region, Region.id == ProductPricing.region_id)
+        .join(RentalPeriod, RentalPeriod.id == ProductPricing.rental_period_id)
+        .group_by(
+            func.grouping_sets(
+                tuple_(Region.name), tuple_(RentalPeriod.duration_months)
+            )
+        )
+    )
+
+    attribute_facets = (
+        select(
+            literal(1).label("region_set"),
+            literal(1).label("period_set"),
+            null(),
+            null(),
+            Attribute.name,
+            AttributeValue.value,
+            null(),
+            null(),
+            # A product has each attribute, and each value of it, only once
+            func.count(),
+        )
+        .select_from(Attribute)
+        .join(AttributeValue, AttributeValue.attribute_id == Attribute.id)
+        .group_by(Attribute.name, AttributeValue.value)
+    )
+    if region is not None or rental_period is not None:
+        attribute_facets = attribute_facets.filter(
+            select(ProductPricing.product_id)
+            .join(Region, Region.id == ProductPricing.region_id)
+            .join(RentalPeriod, RentalPeriod.id == ProductPricing.rental_period_id)
+            .filter(ProductPricing.product_id == Attribute.product_id)
+            .filter(region_match, period_match)
+            .exists()
+        )
+
+    return union_all(pricing_facets, attribute_facets)
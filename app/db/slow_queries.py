@@ -0,0 +1,246 @@
+"""Slow-query logging with sampled execution plans.
+
+Every statement executed through the application engine is timed. Statements
+slower than ``SLOW_QUERY_THRESHOLD_MS`` (including ones that failed, e.g. on
+``statement_timeout``) are logged with their parameters, duration and the
+route that issued them. A fraction (``SLOW_QUERY_EXPLAIN_SAMPLE_RATE``) of slow
+``SELECT`` statements is re-run with ``EXPLAIN (ANALYZE, BUFFERS)`` in a
+background thread, on a connection of its own and in a read-only transaction
+that is rolled back. The resulting plans are kept in a bounded ring buffer
+exposed by ``GET /admin/slow-queries``.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest parameter representation logged per statement.
+_MAX_PARAMETERS_LENGTH = 1000
+
+# EXPLAIN runs allowed to wait for the background thread; further samples are
+# dropped rather than piling up behind a struggling database.
+_MAX_PENDING_EXPLAINS = 10
+
+
+class SlowQueryPlan(NamedTuple):
+    """Execution plan captured for a slow statement."""
+
+    statement: str
+    parameters: str
+    route: str | None
+    duration_ms: float
+    recorded_at: float
+    plan: str
+
+
+class SlowQueryLog:
+    """Time statements on an engine, logging and explaining the slow ones.
+
+    Attributes:
+        threshold_ms (float): Duration above which a statement is slow.
+        sample_rate (float): Fraction of slow SELECTs that are explained.
+        explain_timeout_ms (int): statement_timeout for each EXPLAIN run.
+        plans (deque[SlowQueryPlan]): The most recently captured plans.
+        slow_queries (int): Slow statements seen.
+        explained (int): Plans captured.
+        explain_failures (int): EXPLAIN runs that failed.
+        explains_dropped (int): Samples skipped because too many were pending.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        sample_rate: float,
+        plans_kept: int,
+        explain_timeout_ms: int,
+    ) -> None:
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.explain_timeout_ms = explain_timeout_ms
+        self.plans: deque[SlowQueryPlan] = deque(maxlen=plans_kept)
+        self.slow_queries = 0
+        self.explained = 0
+        self.explain_failures = 0
+        self.explains_dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._explain_engine: Engine | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def install(self, engine: Engine) -> None:
+        """Start timing the statements executed on ``engine``.
+
+        Args:
+            engine (Engine): The application engine.
+        """
+        # EXPLAIN runs on connections of its own, so it never competes with
+        # requests for the pool and its statements are not timed themselves.
+        self._explain_engine = create_engine(engine.url, poolclass=NullPool)
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="slow-query-explain")
+        event.listen(engine, "before_cursor_execute", _start_timer)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+        event.listen(engine, "checkin", _forget_route)
+
+    def recent_plans(self) -> list[SlowQueryPlan]:
+        """Return the captured plans, newest first."""
+        with self._lock:
+            return list(reversed(self.plans))
+
+    def close(self) -> None:
+        """Stop explaining queries and close the EXPLAIN connections.
+
+        Statements are still timed and logged afterwards, as the listeners stay
+        on the engine; samples are counted as dropped instead of explained.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self._explain_engine is not None:
+            self._explain_engine.dispose()
+
+    def _after_execute(
+        self,
+        conn: Any,
+        _cursor: Any,
+        statement: str,
+        parameters: Any,
+        _context: Any,
+        executemany: bool,
+    ) -> None:
+        started = _stop_timer(conn)
+        if started is not None:
+            self._check(conn, statement, parameters, started, executemany, None)
+
+    def _on_error(self, context: Any) -> None:
+        conn = context.connection
+        started = None if conn is None else _stop_timer(conn)
+        if started is not None and context.statement is not None:
+            self._check(
+                conn,
+                context.statement,
+                context.parameters,
+                started,
+                True,  # never explain a statement that failed
+                context.original_exception,
+            )
+
+    def _check(  # noqa: PLR0913, PLR0917
+        self,
+        conn: Any,
+        statement: str,
+        parameters: Any,
+        started: float,
+        executemany: bool,
+        error: BaseException | None,
+    ) -> None:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        route = conn.info.get("route")
+        with self._lock:
+            self.slow_queries += 1
+        logger.warning(
+            "Slow query (%.1f ms) from %s%s: %s; parameters: %s",
+            duration_ms,
+            route or "unknown route",
+            f", failed with {type(error).__name__}" if error is not None else "",
+            " ".join(statement.split()),
+            repr(parameters)[:_MAX_PARAMETERS_LENGTH],
+        )
+
+        explainable = not executemany and statement.lstrip()[:6].upper() == "SELECT"
+        if explainable and random.random() < self.sample_rate:
+            self._submit_explain(statement, parameters, route, duration_ms)
+
+    def _submit_explain(
+        self, statement: str, parameters: Any, route: str | None, duration_ms: float
+    ) -> None:
+        with self._lock:
+            executor = self._executor
+            if executor is None or self._pending >= _MAX_PENDING_EXPLAINS:
+                self.explains_dropped += 1
+                return
+            self._pending += 1
+        try:
+            executor.submit(self._explain, statement, parameters, route, duration_ms)
+        except RuntimeError:
+            # Shut down by close() since the executor was read
+            with self._lock:
+                self._pending -= 1
+                self.explains_dropped += 1
+
+    def _explain(
+        self, statement: str, parameters: Any, route: str | None, duration_ms: float
+    ) -> None:
+        assert self._explain_engine is not None
+        try:
+            with self._explain_engine.connect() as conn:
+                conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"
+                )
+                rows = conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                ).all()
+                conn.rollback()
+        except SQLAlchemyError:
+            logger.warning("EXPLAIN of slow query failed", exc_info=True)
+            with self._lock:
+                self._pending -= 1
+                self.explain_failures += 1
+            return
+
+        plan = SlowQueryPlan(
+            statement=statement,
+            parameters=repr(parameters)[:_MAX_PARAMETERS_LENGTH],
+            route=route,
+            duration_ms=round(duration_ms, 3),
+            recorded_at=time.time(),
+            plan="\n".join(row[0] for row in rows),
+        )
+        with self._lock:
+            self._pending -= 1
+            self.explained += 1
+            self.plans.append(plan)
+
+
+def _start_timer(conn: Any, *_: Any) -> None:
+    conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+
+def _stop_timer(conn: Any) -> float | None:
+    started = conn.info.get("slow_query_start")
+    return started.pop() if started else None
+
+
+def _forget_route(_dbapi_connection: Any, connection_record: Any) -> None:
+    # Connection info outlives the checkout, so the route must not leak into
+    # statements of whoever uses the connection next.
+    connection_record.info.pop("route", None)
+    connection_record.info.pop("slow_query_start", None)
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    plans_kept=settings.SLOW_QUERY_PLANS_KEPT,
+    explain_timeout_ms=settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+)
@@ -0,0 +1,400 @@
+"""Memory-mapped catalog snapshot shared by all worker processes.
+
+A single builder serializes the whole catalog into one versioned file::
+
+    header | product records (JSON) | index (JSON)
+
+The header is ``MAGIC``, the format version, the catalog version the snapshot
+was built from (see ``catalog_version_stmt``), and the offset and length of
+the index. The index lists, for every product in ID order,
+the position of its record together with the (region, rental period) pairs it
+is priced for, so filtered listings are answered without decoding records.
+
+Workers map the file read-only, so the record pages live once in the OS page
+cache no matter how many uvicorn processes serve from them. The builder writes
+to a temporary file and renames it over the previous snapshot; readers notice
+the new inode and swap to it atomically while in-flight reads finish on the old
+mapping.
+
+The snapshot does not see writes made after it was built. Workers poll the
+catalog version and rebuild the snapshot once it changed, so it lags the
+database by up to ``CATALOG_SNAPSHOT_REFRESH_INTERVAL`` plus the rebuild time;
+responses served from it carry its version and age in the
+``X-Catalog-Snapshot-Version`` and ``X-Catalog-Snapshot-Age`` headers.
+
+Build a snapshot with ``python -m app.db.snapshot``.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.queries import catalog_version_stmt
+from app.models.models import Attribute, Product, ProductPricing
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION_HEADER = "X-Catalog-Snapshot-Version"
+SNAPSHOT_AGE_HEADER = "X-Catalog-Snapshot-Age"
+
+MAGIC = b"CINCHSNP"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIQQQ")
+
+# Products are streamed from the database in batches of this size while the
+# snapshot is written, so the builder never holds the whole catalog in memory.
+_BUILD_BATCH_SIZE = 500
+
+
+class SnapshotFormatError(ValueError):
+    """Raised when a snapshot file is truncated or was written by another format."""
+
+
+def product_to_dict(product: Product) -> dict[str, Any]:
+    """Serialize a product in the shape of ``ProductResponse``.
+
+    Args:
+        product (Product): Product with attributes and pricings loaded.
+
+    Returns:
+        dict[str, Any]: JSON-serializable product representation.
+    """
+    return {
+        "id": product.id,
+        "name": product.name,
+        "description": product.description,
+        "sku": product.sku,
+        "attributes": [
+            {
+                "id": attr.id,
+                "name": attr.name,
+                "values": [{"id": val.id, "value": val.value} for val in attr.values],
+            }
+            for attr in product.attributes
+        ],
+        "pricings": [
+            {
+                "rental_period": pricing.rental_period.duration_months,
+                "region": pricing.region.name,
+                "price": pricing.price,
+            }
+            for pricing in product.pricings
+        ],
+    }
+
+
+def write_snapshot(db: Session, path: str) -> int:
+    """Write the full catalog to ``path`` and atomically replace any old snapshot.
+
+    Args:
+        db (Session): Session used to read the catalog.
+        path (str): Destination of the snapshot file.
+
+    Returns:
+        int: Catalog version of the written snapshot.
+    """
+    # The version is read before the products, so a write committed while the
+    # snapshot is built can only make the data newer than its version, which
+    # just causes one more rebuild, never a stale snapshot that looks current.
+    version = db.scalar(catalog_version_stmt()) or 0
+    stmt = (
+        select(Product)
+        .options(
+            selectinload(Product.attributes).selectinload(Attribute.values),
+            selectinload(Product.pricings).selectinload(ProductPricing.rental_period),
+            selectinload(Product.pricings).selectinload(ProductPricing.region),
+        )
+        .order_by(Product.id)
+        .execution_options(yield_per=_BUILD_BATCH_SIZE)
+    )
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    index: list[list[Any]] = []
+    try:
+        with open(tmp_path, "wb") as file:
+            file.write(b"\0" * _HEADER.size)
+            offset = _HEADER.size
+            for product in db.scalars(stmt):
+                record = json.dumps(
+                    product_to_dict(product), separators=(",", ":")
+                ).encode()
+                file.write(record)
+                pairs = sorted(
+                    {
+                        (pricing.region.name, pricing.rental_period.duration_months)
+                        for pricing in product.pricings
+                    }
+                )
+                index.append([product.id, offset, len(record), pairs])
+                offset += len(record)
+
+            index_bytes = json.dumps(index, separators=(",", ":")).encode()
+            file.write(index_bytes)
+            file.seek(0)
+            file.write(
+                _HEADER.pack(MAGIC, FORMAT_VERSION, version, offset, len(index_bytes))
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    logger.info("Wrote catalog snapshot %s with %d products", version, len(index))
+    return version
+
+
+@contextmanager
+def builder_lock(path: str) -> Iterator[bool]:
+    """Elect a single snapshot builder across processes sharing ``path``.
+
+    Args:
+        path (str): Snapshot file path; the lock file lives next to it.
+
+    Yields:
+        bool: True if this process holds the lock and should build.
+    """
+    with open(f"{path}.lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CatalogSnapshot:
+    """Read-only view over one memory-mapped snapshot file.
+
+    Attributes:
+        version (int): Catalog version the snapshot was built from.
+        built_at (float): Unix time the snapshot was written.
+        inode (int): Inode of the mapped file, used to detect replacement.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            self.inode = stat.st_ino
+            self.built_at = stat.st_mtime
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < _HEADER.size:
+            raise SnapshotFormatError(f"{path} is too short to be a snapshot")
+        magic, format_version, version, index_offset, index_length = (
+            _HEADER.unpack_from(self._map)
+        )
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise SnapshotFormatError(f"{path} is not a v{FORMAT_VERSION} snapshot")
+        if index_offset + index_length > len(self._map):
+            raise SnapshotFormatError(f"{path} is truncated")
+
+        self.version: int = version
+        index = json.loads(self._map[index_offset : index_offset + index_length])
+        self._records: list[tuple[int, int]] = []
+        self._pairs: list[frozenset[tuple[str, int]]] = []
+        self._positions: dict[int, int] = {}
+        for position, (product_id, offset, length, pairs) in enumerate(index):
+            self._records.append((offset, length))
+            self._pairs.append(frozenset((region, months) for region, months in pairs))
+            self._positions[product_id] = position
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Response headers telling clients how current the snapshot is."""
+        return {
+            SNAPSHOT_VERSION_HEADER: str(self.version),
+            SNAPSHOT_AGE_HEADER: str(max(int(time.time() - self.built_at), 0)),
+        }
+
+    def _load(self, position: int) -> dict[str, Any]:
+        offset, length = self._records[position]
+        return json.loads(self._map[offset : offset + length])
+
+    def get_product(self, product_id: int) -> dict[str, Any] | None:
+        """Return a product by ID.
+
+        Args:
+            product_id (int): The ID of the product.
+
+        Returns:
+            dict[str, Any] | None: The product, or None if it is not in the
+                snapshot.
+        """
+        position = self._positions.get(product_id)
+        if position is None:
+            return None
+        return self._load(position)
+
+    def list_products(
+        self, region: str | None, rental_period: int | None, offset: int, limit: int
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Return a page of products matching the filters, ordered by ID.
+
+        Args:
+            region (str | None): Optional region name filter.
+            rental_period (int | None): Optional rental period filter in months.
+            offset (int): Number of matching products to skip.
+            limit (int): Maximum number of products to return.
+
+        Returns:
+            tuple[list[dict[str, Any]], int]: The page and the total match count.
+        """
+        matches: Sequence[int]
+        if region is None and rental_period is None:
+            matches = range(len(self._records))
+        else:
+            matches = [
+                position
+                for position, pairs in enumerate(self._pairs)
+                if any(
+                    (region is None or pair_region == region)
+                    and (rental_period is None or months == rental_period)
+                    for pair_region, months in pairs
+                )
+            ]
+        page = [self._load(position) for position in matches[offset : offset + limit]]
+        return page, len(matches)
+
+
+class SnapshotReader:
+    """Serve the newest snapshot at ``path``, reloading it when it is replaced.
+
+    The file is checked at most once per ``check_interval`` seconds, so the
+    cost on the request path is a clock read.
+    """
+
+    def __init__(self, path: str | None, check_interval: float) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: CatalogSnapshot | None = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self) -> CatalogSnapshot | None:
+        """Return the active snapshot, or None if snapshot mode is unavailable."""
+        if self.path is None:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval and self._lock.acquire(
+            blocking=False
+        ):
+            try:
+                self._checked_at = now
+                self._refresh()
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def _refresh(self) -> None:
+        assert self.path is not None
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return
+        if self._snapshot is not None and self._snapshot.inode == inode:
+            return
+        try:
+            snapshot = CatalogSnapshot(self.path)
+        except (OSError, ValueError):
+            logger.exception("Could not load catalog snapshot %s", self.path)
+            return
+        # Readers still holding the previous snapshot keep its mapping alive
+        # until they finish; it is unmapped once garbage collected.
+        self._snapshot = snapshot
+        logger.info("Serving catalog snapshot %s", snapshot.version)
+
+
+def snapshot_version(path: str) -> int | None:
+    """Return the catalog version of the snapshot at ``path`` from its header.
+
+    Args:
+        path (str): Snapshot file path.
+
+    Returns:
+        int | None: The version, or None if there is no readable snapshot.
+    """
+    try:
+        with open(path, "rb") as file:
+            header = file.read(_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < _HEADER.size:
+        return None
+    magic, format_version, version, _, _ = _HEADER.unpack(header)
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        return None
+    return version
+
+
+def _is_current(db: Session, path: str, max_age: float | None) -> bool:
+    """Return whether the snapshot at ``path`` still matches the catalog."""
+    version = snapshot_version(path)
+    if version is None or version != db.scalar(catalog_version_stmt()):
+        return False
+    return max_age is None or time.time() - os.stat(path).st_mtime < max_age
+
+
+def rebuild_if_stale(path: str, max_age: float | None) -> int | None:
+    """Rebuild the snapshot if it is missing, out of date or too old.
+
+    The snapshot is out of date once the catalog version differs from the one
+    it was built from. Every worker may call this on its own schedule: the
+    versions are compared without the builder lock, so a current snapshot costs
+    one query, and only the process that then wins the lock rebuilds, skipping
+    the rebuild if another process refreshed the file in the meantime.
+
+    Args:
+        path (str): Snapshot file path.
+        max_age (float | None): Age in seconds after which the snapshot is
+            rebuilt even if the catalog did not change, or None for no limit.
+
+    Returns:
+        int | None: Version of the new snapshot, or None if nothing was built.
+    """
+    with SessionLocal() as db:
+        if _is_current(db, path, max_age):
+            return None
+    with builder_lock(path) as elected:
+        if not elected:
+            return None
+        with SessionLocal() as db:
+            if _is_current(db, path, max_age):
+                return None
+            db.rollback()
+            return write_snapshot(db, path)
+
+
+catalog_snapshot = SnapshotReader(
+    settings.CATALOG_SNAPSHOT_PATH, settings.CATALOG_SNAPSHOT_CHECK_INTERVAL
+)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if settings.CATALOG_SNAPSHOT_PATH is None:
+        raise SystemExit("CATALOG_SNAPSHOT_PATH is not set")
+    if rebuild_if_stale(settings.CATALOG_SNAPSHOT_PATH, 0) is None:
+        raise SystemExit("Another process is already building the snapshot")
@@ -0,0 +1,97 @@
+"""Database warm-up run during application startup.
+
+Cloud Run scales out by starting cold containers, and the first requests on a
+fresh instance otherwise pay for connecting to Postgres, configuring the ORM
+mappers and compiling the catalog queries. These helpers do that work once
+during the application lifespan, before the instance receives traffic.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, configure_mappers, sessionmaker
+
+from app.core.startup import StartupProfiler, startup_profiler
+from app.db.queries import (
+    catalog_version_stmt,
+    product_count_stmt,
+    product_detail_stmt,
+    product_list_stmt,
+)
+
+logger = logging.getLogger(__name__)
+
+# Filter combinations accepted by ``list_products``; each one compiles to a
+# distinct statement and therefore a distinct compiled cache entry.
+_FILTER_COMBINATIONS: tuple[tuple[str | None, int | None], ...] = (
+    (None, None),
+    ("", None),
+    (None, 0),
+    ("", 0),
+)
+
+
+def prewarm_pool(engine: Engine, connections: int) -> None:
+    """Open ``connections`` pooled connections and return them to the pool.
+
+    The connections are checked out simultaneously so the pool really holds
+    that many live connections afterwards, rather than reusing a single one.
+
+    Args:
+        engine (Engine): Engine whose pool should be filled.
+        connections (int): Number of connections to open.
+    """
+    opened: list[Connection] = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+def warm_statement_cache(session_factory: sessionmaker[Session]) -> None:
+    """Execute every catalog query shape once to populate the compiled cache.
+
+    Parameters are chosen so that no rows match; only the compiled form of the
+    statements is of interest.
+
+    Args:
+        session_factory (sessionmaker[Session]): Factory for the warm-up session.
+    """
+    with session_factory() as db:
+        db.execute(product_detail_stmt(0)).scalars().first()
+        for region, rental_period in _FILTER_COMBINATIONS:
+            db.scalars(product_count_stmt(region, rental_period)).unique().all()
+            db.scalars(product_list_stmt(region, rental_period, 0, 1)).unique().all()
+        db.scalar(catalog_version_stmt())
+
+
+def warm_up(
+    engine: Engine,
+    session_factory: sessionmaker[Session],
+    connections: int,
+    profiler: StartupProfiler = startup_profiler,
+) -> None:
+    """Run all warm-up steps, recording each one with ``profiler``.
+
+    Failures are logged rather than raised so that an unavailable database
+    delays the first request instead of preventing the instance from starting.
+
+    Args:
+        engine (Engine): Application engine.
+        session_factory (sessionmaker[Session]): Application session factory.
+        connections (int): Number of pooled connections to pre-open.
+        profiler (StartupProfiler): Profiler receiving step timings.
+    """
+    with profiler.step("configure mappers"):
+        configure_mappers()
+    try:
+        with profiler.step("prewarm pool"):
+            prewarm_pool(engine, connections)
+        with profiler.step("warm statement cache"):
+            warm_statement_cache(session_factory)
+    except Exception:
+        logger.exception("Database warm-up failed; continuing with a cold pool")
@@ -1,9 +1,103 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
+from app.core.startup import startup_profiler
+
+logger = logging.getLogger(__name__)
+
+with startup_profiler.imports():
+    from app.core.config import settings
+    from app.core.profiling import (
+        ProfilingMiddleware,
+        install_sql_listeners,
+        profile_store,
+    )
+    from app.db.database import SessionLocal, engine
+    from app.db.maintenance import run_maintenance
+    from app.db.slow_queries import slow_query_log
+    from app.db.snapshot import rebuild_if_stale
+    from app.db.warmup import warm_up
+    from app.routers import admin, products
+
+
+async def refresh_catalog_snapshot(
+    path: str, interval: float, max_age: float | None
+) -> None:
+    """Periodically rebuild the catalog snapshot once the catalog changed."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(rebuild_if_stale, path, max_age)
+        except Exception:
+            logger.exception("Catalog snapshot rebuild failed")
+
+
+async def maintain_catalog(interval: float) -> None:
+    """Periodically compact the catalog write log and prune the change log."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(run_maintenance, engine)
+        except Exception:
+            logger.exception("Catalog maintenance failed")
 
-from app.routers import products
 
-app = FastAPI(title="Cinch Product Rental API")
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Warm the database layer before the instance starts serving requests."""
+    if settings.STARTUP_WARMUP:
+        await run_in_threadpool(
+            warm_up, engine, SessionLocal, settings.STARTUP_WARM_CONNECTIONS
+        )
+
+    tasks = []
+    if settings.CATALOG_MAINTENANCE_INTERVAL > 0:
+        tasks.append(
+            asyncio.create_task(maintain_catalog(settings.CATALOG_MAINTENANCE_INTERVAL))
+        )
+
+    snapshot_path = settings.CATALOG_SNAPSHOT_PATH
+    if snapshot_path is not None:
+        with startup_profiler.step("build catalog snapshot"):
+            try:
+                await run_in_threadpool(rebuild_if_stale, snapshot_path, None)
+            except Exception:
+                logger.exception("Catalog snapshot build failed")
+        tasks.append(
+            asyncio.create_task(
+                refresh_catalog_snapshot(
+                    snapshot_path,
+                    settings.CATALOG_SNAPSHOT_REFRESH_INTERVAL,
+                    settings.CATALOG_SNAPSHOT_MAX_AGE,
+                )
+            )
+        )
+
+    startup_profiler.report()
+    yield
+
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    slow_query_log.close()
+    engine.dispose()
+
+
+app = FastAPI(title="Cinch Product Rental API", lifespan=lifespan)
 app.include_router(products.router)
+app.include_router(admin.router)
+
+# Per-request profiling is opt-in; when disabled nothing is installed at all
+if settings.PROFILING_ENABLED:
+    install_sql_listeners(engine)
+    app.add_middleware(ProfilingMiddleware, store=profile_store)
 
 
 @app.get("/")
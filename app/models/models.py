@@ -1,8 +1,22 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    event,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, relationship
 from sqlalchemy.orm.decl_api import mapped_column  # type: ignore
 
@@ -17,6 +31,10 @@ if TYPE_CHECKING:
     RentalPeriod_t: TypeAlias = "RentalPeriod"
     Region_t: TypeAlias = "Region"
     ProductPricing_t: TypeAlias = "ProductPricing"
+    CatalogVersion_t: TypeAlias = "CatalogVersion"
+    CatalogWrite_t: TypeAlias = "CatalogWrite"
+    CatalogChange_t: TypeAlias = "CatalogChange"
+    CatalogChangesPruned_t: TypeAlias = "CatalogChangesPruned"
 
 
 class Product(Base):
@@ -58,9 +76,14 @@ class Attribute(Base):
     """
 
     __tablename__ = "attributes"
+    __table_args__ = (
+        UniqueConstraint("product_id", "name", name="uq_attributes_product_name"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"))
+    product_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("products.id"), index=True
+    )
     name: Mapped[str] = mapped_column(String)
 
     product: Mapped[Product] = relationship("Product", back_populates="attributes")
@@ -80,9 +103,16 @@ class AttributeValue(Base):
     """
 
     __tablename__ = "attribute_values"
+    __table_args__ = (
+        UniqueConstraint(
+            "attribute_id", "value", name="uq_attribute_values_attribute_value"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    attribute_id: Mapped[int] = mapped_column(Integer, ForeignKey("attributes.id"))
+    attribute_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("attributes.id"), index=True
+    )
     value: Mapped[str] = mapped_column(String)
 
     attribute: Mapped[Attribute] = relationship("Attribute", back_populates="values")
@@ -129,11 +159,18 @@ class Region(Base):
 class ProductPricing(Base):
     """Product pricing model for different regions and rental periods.
 
+    The table is list-partitioned on ``region_id``: each region's pricings live
+    in a partition of their own, ``product_pricings_r<region id>``, once
+    ``app.db.partitions`` has attached it; until then they live in the default
+    partition. Queries comparing ``region_id`` with a value only scan the
+    matching partition. Postgres requires the partition key in every unique
+    constraint, hence the composite primary key.
+
     Attributes:
-        id (int): Primary key for the pricing.
+        id (int): Primary key for the pricing, together with ``region_id``.
         product_id (int): Foreign key referencing the product.
         rental_period_id (int): Foreign key referencing the rental period.
-        region_id (int): Foreign key referencing the region.
+        region_id (int): Foreign key referencing the region; the partition key.
         price (float): Price for the product in this configuration.
         product (Product): Related product.
         rental_period (RentalPeriod): Related rental period.
@@ -141,13 +178,26 @@ class ProductPricing(Base):
     """
 
     __tablename__ = "product_pricings"
+    __table_args__ = (
+        UniqueConstraint(
+            "product_id",
+            "region_id",
+            "rental_period_id",
+            name="uq_product_pricings_product_region_period",
+        ),
+        {"postgresql_partition_by": "LIST (region_id)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"))
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    product_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("products.id"), index=True
+    )
     rental_period_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("rental_periods.id")
+        Integer, ForeignKey("rental_periods.id"), index=True
+    )
+    region_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("regions.id"), primary_key=True
     )
-    region_id: Mapped[int] = mapped_column(Integer, ForeignKey("regions.id"))
     price: Mapped[float] = mapped_column(Float)
 
     product: Mapped[Product] = relationship("Product", back_populates="pricings")
@@ -155,3 +205,212 @@ class ProductPricing(Base):
         "RentalPeriod", back_populates="pricings"
     )
     region: Mapped[Region] = relationship("Region", back_populates="pricings")
+
+
+class CatalogVersion(Base):
+    """Single-row count of the catalog writes compacted from ``CatalogWrite``.
+
+    The catalog version is this count plus the number of writes not compacted
+    yet (see ``catalog_version_stmt``). Writers never update this row, so they
+    do not queue behind each other on it; it is only updated when writes are
+    compacted, see ``app.db.maintenance``.
+
+    Attributes:
+        id (int): Primary key, always 1.
+        version (int): Number of catalog-modifying transactions compacted.
+    """
+
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class CatalogWrite(Base):
+    """Transaction that modified the catalog, until it is compacted.
+
+    Statement-level triggers on every catalog table insert the ID of the
+    writing transaction once. Concurrent writers insert different keys, so
+    they never wait for each other, and like any row an entry only becomes
+    visible once the change that produced it is committed.
+
+    Attributes:
+        txid (int): ID of the transaction that modified the catalog.
+    """
+
+    __tablename__ = "catalog_writes"
+
+    txid: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+
+
+class CatalogChange(Base):
+    """Change-log entry recording that a product was created, updated or deleted.
+
+    Entries are written by row-level triggers on the products, attributes,
+    attribute_values and product_pricings tables, so every write path is
+    tracked, including ad-hoc SQL. Changes to a product's attributes, values or
+    pricings are recorded as updates of that product.
+
+    Attributes:
+        id (int): Primary key, increasing in insertion order.
+        txid (int): ID of the transaction that made the change; entries are
+            read in ``(txid, id)`` order, see ``product_changes_stmt``.
+        product_id (int): The changed product. Not a foreign key, as deleted
+            products are recorded too.
+        change (str): One of ``created``, ``updated`` or ``deleted``.
+        changed_at (datetime): When the change was made.
+    """
+
+    __tablename__ = "catalog_changes"
+    __table_args__ = (Index("ix_catalog_changes_txid_id", "txid", "id"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    txid: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("txid_current()"), nullable=False
+    )
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    change: Mapped[str] = mapped_column(String, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class CatalogChangesPruned(Base):
+    """Single-row cursor up to which the change log has been pruned.
+
+    Entries up to and including ``(txid, change_id)`` have been deleted by
+    ``app.db.maintenance``, so the feed can no longer be read from a cursor
+    before it.
+
+    Attributes:
+        id (int): Primary key, always 1.
+        txid (int): Transaction ID of the last pruned entry.
+        change_id (int): ID of the last pruned entry.
+    """
+
+    __tablename__ = "catalog_changes_pruned"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    txid: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    change_id: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+CATALOG_TABLES = (
+    "products",
+    "attributes",
+    "attribute_values",
+    "regions",
+    "rental_periods",
+    "product_pricings",
+)
+
+BUMP_CATALOG_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalog_writes (txid) VALUES (txid_current())
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def bump_catalog_version_trigger(table: str) -> str:
+    """Return the DDL installing the catalog version trigger on ``table``."""
+    return (
+        f"CREATE OR REPLACE TRIGGER {table}_bump_catalog_version "
+        f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()"
+    )
+
+
+CHANGE_TRACKED_TABLES = (
+    "products",
+    "attributes",
+    "attribute_values",
+    "product_pricings",
+)
+
+RECORD_CATALOG_CHANGE_FUNCTION = """
+CREATE OR REPLACE FUNCTION record_catalog_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'products' THEN
+        INSERT INTO catalog_changes (product_id, change)
+        VALUES (
+            coalesce(NEW.id, OLD.id),
+            CASE TG_OP
+                WHEN 'INSERT' THEN 'created'
+                WHEN 'DELETE' THEN 'deleted'
+                ELSE 'updated'
+            END
+        );
+    ELSIF TG_TABLE_NAME = 'attribute_values' THEN
+        INSERT INTO catalog_changes (product_id, change)
+        SELECT DISTINCT product_id, 'updated' FROM attributes
+        WHERE id IN (NEW.attribute_id, OLD.attribute_id);
+    ELSE
+        INSERT INTO catalog_changes (product_id, change)
+        SELECT DISTINCT product_id, 'updated'
+        FROM (VALUES (NEW.product_id), (OLD.product_id)) AS t (product_id)
+        WHERE product_id IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def record_catalog_change_trigger(table: str) -> str:
+    """Return the DDL installing the change-log trigger on ``table``."""
+    return (
+        f"CREATE OR REPLACE TRIGGER {table}_record_catalog_change "
+        f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        "FOR EACH ROW EXECUTE FUNCTION record_catalog_change()"
+    )
+
+
+PRICING_DEFAULT_PARTITION = (
+    "CREATE TABLE IF NOT EXISTS product_pricings_default "
+    "PARTITION OF product_pricings DEFAULT"
+)
+
+
+# Install the same objects the migrations create when the schema is built with
+# metadata.create_all, e.g. by the test suite.
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0)"),
+)
+event.listen(
+    CatalogChangesPruned.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_changes_pruned (id, txid, change_id) VALUES (1, 0, 0)"),
+)
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(BUMP_CATALOG_VERSION_FUNCTION).execute_if(dialect="postgresql"),
+)
+for _table in CATALOG_TABLES:
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(bump_catalog_version_trigger(_table)).execute_if(dialect="postgresql"),
+    )
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(RECORD_CATALOG_CHANGE_FUNCTION).execute_if(dialect="postgresql"),
+)
+for _table in CHANGE_TRACKED_TABLES:
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(record_catalog_change_trigger(_table)).execute_if(dialect="postgresql"),
+    )
+event.listen(
+    ProductPricing.__table__,
+    "after_create",
+    DDL(PRICING_DEFAULT_PARTITION).execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,240 @@
+from collections.abc import Sequence
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from app.core.admission import admission_controller
+from app.core.coalescing import SingleFlight
+from app.core.profiling import profile_store
+from app.core.security import require_admin_token
+from app.db.slow_queries import slow_query_log
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+class CoalescingStats(BaseModel):
+    """Request coalescing counters for one endpoint.
+
+    Attributes:
+        leaders (int): Requests that ran a database fetch.
+        coalesced (int): Requests that shared another request's fetch.
+        failures (int): Shared fetches that raised an error.
+        abandoned (int): Fetches cancelled because every waiting client left.
+        in_flight (int): Fetches currently running.
+    """
+
+    leaders: int
+    coalesced: int
+    failures: int
+    abandoned: int
+    in_flight: int
+
+
+class AdmissionStats(BaseModel):
+    """Admission control counters for this worker.
+
+    Attributes:
+        active (int): Database fetches currently running.
+        waiting (int): Requests currently queued for a slot.
+        admitted (int): Requests given a slot.
+        queued (int): Requests that had to wait for a slot.
+        rejected (int): Requests shed because the queue was full.
+        timed_out (int): Requests shed after waiting too long for a slot.
+    """
+
+    active: int
+    waiting: int
+    admitted: int
+    queued: int
+    rejected: int
+    timed_out: int
+
+
+class MetricsResponse(BaseModel):
+    """Response model for in-process service metrics.
+
+    Attributes:
+        coalescing (dict[str, CoalescingStats]): Coalescing counters by endpoint.
+        admission (AdmissionStats): Admission control counters.
+    """
+
+    coalescing: dict[str, CoalescingStats]
+    admission: AdmissionStats
+
+
+class ProfileSummary(BaseModel):
+    """A stored request profile.
+
+    Attributes:
+        id (str): ID of the profile, as sent in the X-Profile-Id header.
+        method (str): HTTP method of the request.
+        path (str): Path and query string of the request.
+        status_code (int): Status code of the response.
+        started_at (float): Unix time the request started.
+        duration_ms (float): Time taken by the request.
+        sql_ms (float): Time spent executing SQL statements.
+        statement_count (int): Number of SQL statements executed.
+    """
+
+    id: str
+    method: str
+    path: str
+    status_code: int
+    started_at: float
+    duration_ms: float
+    sql_ms: float
+    statement_count: int
+
+
+class StatementTiming(BaseModel):
+    """A SQL statement executed by a profiled request.
+
+    Attributes:
+        statement (str): The SQL sent to the database.
+        parameters (str): The statement's parameters, possibly truncated.
+        duration_ms (float): Time taken to execute it.
+        thread (str): Thread that executed it.
+    """
+
+    statement: str
+    parameters: str
+    duration_ms: float
+    thread: str
+
+
+class ProfileResponse(ProfileSummary):
+    """A stored request profile with its SQL statements.
+
+    Attributes:
+        statements (Sequence[StatementTiming]): SQL executed, in order.
+        summary (str): Functions with the highest cumulative time.
+    """
+
+    statements: Sequence[StatementTiming]
+    summary: str
+
+
+@router.get(
+    "/profiles",
+    response_model=list[ProfileSummary],
+    dependencies=[Depends(require_admin_token)],
+)
+async def list_profiles() -> list[ProfileSummary]:
+    return [ProfileSummary(**profile) for profile in profile_store.list()]
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_model=ProfileResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def get_profile(profile_id: str) -> ProfileResponse:
+    profile = profile_store.load(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return ProfileResponse(**profile)
+
+
+@router.get(
+    "/profiles/{profile_id}/download",
+    response_class=FileResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def download_profile(profile_id: str) -> FileResponse:
+    """Download the profile in pstats format, e.g. for snakeviz."""
+    path = profile_store.stats_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(
+        path, media_type="application/octet-stream", filename=f"{profile_id}.prof"
+    )
+
+
+class SlowQueryPlan(BaseModel):
+    """Execution plan captured for a slow statement.
+
+    Attributes:
+        statement (str): The SQL that was slow.
+        parameters (str): The statement's parameters, possibly truncated.
+        route (str | None): Route that issued the statement, if known.
+        duration_ms (float): Time the statement originally took.
+        recorded_at (float): Unix time the plan was captured.
+        plan (str): Output of EXPLAIN (ANALYZE, BUFFERS).
+    """
+
+    statement: str
+    parameters: str
+    route: str | None
+    duration_ms: float
+    recorded_at: float
+    plan: str
+
+
+class SlowQueriesResponse(BaseModel):
+    """Response model for the slow-query log of this worker.
+
+    Attributes:
+        threshold_ms (float): Duration above which statements are slow.
+        sample_rate (float): Fraction of slow SELECTs that are explained.
+        slow_queries (int): Slow statements seen.
+        explained (int): Plans captured.
+        explain_failures (int): EXPLAIN runs that failed.
+        explains_dropped (int): Samples skipped because too many were pending.
+        plans (Sequence[SlowQueryPlan]): Most recent plans, newest first.
+    """
+
+    threshold_ms: float
+    sample_rate: float
+    slow_queries: int
+    explained: int
+    explain_failures: int
+    explains_dropped: int
+    plans: Sequence[SlowQueryPlan]
+
+
+@router.get(
+    "/slow-queries",
+    response_model=SlowQueriesResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def get_slow_queries() -> SlowQueriesResponse:
+    return SlowQueriesResponse(
+        threshold_ms=slow_query_log.threshold_ms,
+        sample_rate=slow_query_log.sample_rate,
+        slow_queries=slow_query_log.slow_queries,
+        explained=slow_query_log.explained,
+        explain_failures=slow_query_log.explain_failures,
+        explains_dropped=slow_query_log.explains_dropped,
+        plans=[
+            SlowQueryPlan(**plan._asdict()) for plan in slow_query_log.recent_plans()
+        ],
+    )
+
+
+@router.get(
+    "/metrics",
+    response_model=MetricsResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def get_metrics() -> MetricsResponse:
+    return MetricsResponse(
+        coalescing={
+            name: CoalescingStats(
+                leaders=flight.leaders,
+                coalesced=flight.coalesced,
+                failures=flight.failures,
+                abandoned=flight.abandoned,
+                in_flight=flight.in_flight,
+            )
+            for name, flight in SingleFlight.registry.items()
+        },
+        admission=AdmissionStats(
+            active=admission_controller.active,
+            waiting=admission_controller.waiting,
+            admitted=admission_controller.admitted,
+            queued=admission_controller.queued,
+            rejected=admission_controller.rejected,
+            timed_out=admission_controller.timed_out,
+        ),
+    )
@@ -1,19 +1,73 @@
-from collections.abc import Sequence
-from typing import Annotated
-
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from pydantic import BaseModel, ConfigDict
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
-
-from app.db.database import get_db
-from app.models.models import Attribute, Product, ProductPricing, Region, RentalPeriod
+import asyncio
+import time
+from collections.abc import Callable, Hashable, Sequence
+from typing import Annotated, Literal, TypeVar
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+)
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.admission import admission_controller
+from app.core.cache import VersionedCache
+from app.core.coalescing import SingleFlight
+from app.core.config import settings
+from app.core.deadlines import (
+    deadline_exceeded,
+    is_query_canceled,
+    remaining_ms,
+    request_deadline,
+    until_disconnected,
+)
+from app.core.profiling import in_request_profile
+from app.core.security import require_admin_token
+from app.db.bulk import (
+    AttributeRow,
+    Outcome,
+    PricingRow,
+    upsert_attributes,
+    upsert_pricings,
+)
+from app.db.database import SessionLocal, cancel_query, get_db, session_deadline
+from app.db.queries import (
+    catalog_version_stmt,
+    changes_pruned_through_stmt,
+    product_changes_stmt,
+    product_count_stmt,
+    product_detail_stmt,
+    product_facets_stmt,
+    product_list_stmt,
+    products_by_id_stmt,
+)
+from app.db.snapshot import catalog_snapshot
+from app.models.models import Attribute, Product
+
+T = TypeVar("T")
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 # Dependency
 db_dependency = Depends(get_db)
 
+# Identical concurrent reads share a single database fetch
+product_flight = SingleFlight("get_product", enabled=settings.COALESCE_REQUESTS)
+product_list_flight = SingleFlight("list_products", enabled=settings.COALESCE_REQUESTS)
+facets_flight = SingleFlight("product_facets", enabled=settings.COALESCE_REQUESTS)
+
+# Facet counts keyed by filter set, valid until the catalog version changes
+facets_cache: VersionedCache["FacetsResponse"] = VersionedCache(
+    settings.FACETS_CACHE_SIZE
+)
+
 
 class AttributeValueResponse(BaseModel):
     """Response model for attribute values.
@@ -98,39 +152,287 @@ class ProductListResponse(BaseModel):
     total: int
 
 
-@router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(
-    product_id: Annotated[
-        int, Path(description="The ID of the product to retrieve", examples=[1], ge=1)
-    ],
-    db: Session = db_dependency,
-    attributes_page: Annotated[
-        int,
-        Query(ge=1, description="Page number for attributes pagination", examples=[1]),
-    ] = 1,
-    attributes_per_page: Annotated[
-        int, Query(ge=1, description="Number of attributes per page", examples=[10])
-    ] = 10,
-) -> ProductResponse:
-    # Optimized query with eager loading and pagination
-    stmt = (
-        select(Product)
-        .options(
-            joinedload(Product.attributes).joinedload(Attribute.values),
-            joinedload(Product.pricings).joinedload(ProductPricing.rental_period),
-            joinedload(Product.pricings).joinedload(ProductPricing.region),
+class RegionFacet(BaseModel):
+    """Number of products available in a region.
+
+    Attributes:
+        region (str): Name of the region.
+        count (int): Distinct products priced in this region.
+    """
+
+    region: str
+    count: int
+
+
+class RentalPeriodFacet(BaseModel):
+    """Number of products available for a rental period.
+
+    Attributes:
+        rental_period (int): Duration of the rental period in months.
+        count (int): Distinct products priced for this rental period.
+    """
+
+    rental_period: int
+    count: int
+
+
+class AttributeValueFacet(BaseModel):
+    """Number of products having an attribute value.
+
+    Attributes:
+        value (str): The attribute value.
+        count (int): Distinct products with this value.
+    """
+
+    value: str
+    count: int
+
+
+class AttributeFacet(BaseModel):
+    """Product counts for every value of one attribute.
+
+    Attributes:
+        name (str): Name of the attribute.
+        values (Sequence[AttributeValueFacet]): Counts per value.
+    """
+
+    name: str
+    values: Sequence[AttributeValueFacet]
+
+
+class FacetsResponse(BaseModel):
+    """Response model for product counts per filter option.
+
+    Each facet is counted with every requested filter except its own, so the
+    counts for all regions are returned even when a region is selected.
+
+    Attributes:
+        regions (Sequence[RegionFacet]): Counts per region.
+        rental_periods (Sequence[RentalPeriodFacet]): Counts per rental period.
+        attributes (Sequence[AttributeFacet]): Counts per attribute value.
+        version (int): Catalog version the counts were computed from.
+    """
+
+    regions: Sequence[RegionFacet]
+    rental_periods: Sequence[RentalPeriodFacet]
+    attributes: Sequence[AttributeFacet]
+    version: int
+
+
+ChangeKind = Literal["created", "updated", "deleted"]
+
+
+class ProductChange(BaseModel):
+    """A product created, updated or deleted since the requested cursor.
+
+    Attributes:
+        product_id (int): The ID of the changed product.
+        change (str): ``created``, ``updated`` or ``deleted``.
+        product (ProductResponse | None): The product's current state, or None
+            if it has been deleted.
+    """
+
+    product_id: int
+    change: ChangeKind
+    product: ProductResponse | None
+
+
+class ProductChangesResponse(BaseModel):
+    """Response model for a batch of the catalog change feed.
+
+    Attributes:
+        changes (Sequence[ProductChange]): Changed products, each listed once
+            with its latest change in this batch.
+        next_cursor (str): Cursor to pass as ``since`` to read the next batch.
+        has_more (bool): Whether further changes are already available.
+    """
+
+    changes: Sequence[ProductChange]
+    next_cursor: str
+    has_more: bool
+
+
+class PricingUpsert(BaseModel):
+    """A product price to create or update.
+
+    Attributes:
+        sku (str): SKU of the product.
+        region (str): Name of the region.
+        rental_period (int): Duration of the rental period in months.
+        price (float): The new price.
+    """
+
+    sku: str
+    region: str
+    rental_period: int
+    price: float = Field(ge=0)
+
+
+class AttributeUpsert(BaseModel):
+    """A product attribute to create, or whose values to replace.
+
+    Attributes:
+        sku (str): SKU of the product.
+        name (str): Name of the attribute.
+        values (Sequence[str]): The attribute's complete set of values.
+    """
+
+    sku: str
+    name: str
+    values: Sequence[str]
+
+
+class BulkUpsertRequest(BaseModel):
+    """Request model for bulk catalog writes.
+
+    Attributes:
+        pricings (Sequence[PricingUpsert]): Prices to write.
+        attributes (Sequence[AttributeUpsert]): Attributes to write.
+    """
+
+    pricings: Sequence[PricingUpsert] = Field(
+        default=(), max_length=settings.BULK_UPSERT_MAX_ROWS
+    )
+    attributes: Sequence[AttributeUpsert] = Field(
+        default=(), max_length=settings.BULK_UPSERT_MAX_ROWS
+    )
+
+
+class RowOutcome(BaseModel):
+    """Outcome of one row of a bulk write.
+
+    Attributes:
+        status (str): ``created``, ``updated``, ``unchanged``, ``superseded``
+            (a later row has the same key) or ``failed``.
+        detail (str | None): Reason for a failed or superseded row.
+    """
+
+    status: Literal["created", "updated", "unchanged", "superseded", "failed"]
+    detail: str | None = None
+
+
+class BulkUpsertStats(BaseModel):
+    """Totals and throughput of a bulk write.
+
+    Attributes:
+        rows (int): Number of rows submitted.
+        created (int): Rows that created a pricing or attribute.
+        updated (int): Rows that changed an existing one.
+        unchanged (int): Rows that matched what was already stored.
+        failed (int): Rows that could not be applied.
+        seconds (float): Time spent applying the rows.
+        rows_per_second (float): Rows processed per second.
+    """
+
+    rows: int
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    seconds: float
+    rows_per_second: float
+
+
+class BulkUpsertResponse(BaseModel):
+    """Response model for bulk catalog writes.
+
+    Attributes:
+        pricings (Sequence[RowOutcome]): Outcome of each pricing row, in order.
+        attributes (Sequence[RowOutcome]): Outcome of each attribute row, in
+            order.
+        stats (BulkUpsertStats): Totals and throughput.
+    """
+
+    pricings: Sequence[RowOutcome]
+    attributes: Sequence[RowOutcome]
+    stats: BulkUpsertStats
+
+
+def _call_and_close(fn: Callable[..., T], db: Session, *args: object) -> T:
+    """Call ``fn`` with ``db``, then return the session's connection to the pool."""
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def _run_db(db: Session, fn: Callable[..., T], *args: object) -> T:
+    """Run blocking database work in the threadpool once admitted.
+
+    The session is closed in the worker thread before the slot is released, so
+    a slot is only handed on once its connection is back in the pool; the
+    session can still be used again afterwards. If the awaiting request is
+    cancelled, the running statement is cancelled in Postgres and the slot is
+    held until the worker thread has let go of the connection.
+
+    Raises:
+        HTTPException: 503 if the worker is saturated and the request is shed,
+            or 504 if the request's deadline passes before the work completes.
+    """
+    async with admission_controller.slot():
+        deadline = session_deadline(db)
+        if deadline is not None and remaining_ms(deadline) == 0:
+            raise deadline_exceeded()
+
+        work = asyncio.ensure_future(
+            run_in_threadpool(_call_and_close, in_request_profile(fn), db, *args)
         )
-        .filter(Product.id == product_id)
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            if not work.done():
+                await run_in_threadpool(cancel_query, db)
+                await asyncio.wait({work})
+            raise
+        except OperationalError as exc:
+            if is_query_canceled(exc):
+                raise deadline_exceeded() from exc
+            raise
+
+
+async def _run_shared(
+    db: Session,
+    flight: SingleFlight,
+    key: Hashable,
+    fn: Callable[..., T],
+    *args: object,
+) -> T:
+    """Run a fetch shared by coalesced requests in a session of its own.
+
+    The fetch must not depend on the request that happened to start it: that
+    request's session is closed when it disconnects, and its deadline may be
+    far shorter than those of the requests joining it. The shared session is
+    bounded by the latest deadline among the requests waiting on ``key`` when
+    its transaction begins; each request still stops waiting at its own
+    deadline (see ``until_disconnected``).
+    """
+    own_deadline = session_deadline(db)
+
+    def latest_deadline() -> float | None:
+        # Nobody is registered when coalescing is off for this call
+        deadline = flight.deadline(key)
+        return own_deadline if deadline is None else deadline
+
+    shared = SessionLocal(
+        bind=db.get_bind(),
+        info={"deadline": latest_deadline, "route": db.info.get("route")},
     )
-    product = db.execute(stmt).scalars().first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    return await _run_db(shared, fn, *args)
 
-    # Paginate attributes
-    start = (attributes_page - 1) * attributes_per_page
-    end = start + attributes_per_page
-    paginated_attributes = product.attributes[start:end]
 
+def _product_response(
+    product: Product, attributes: Sequence[Attribute] | None = None
+) -> ProductResponse:
+    """Build the response for an eagerly loaded product.
+
+    Args:
+        product (Product): The product with attributes and pricings loaded.
+        attributes (Sequence[Attribute] | None): Attributes to include, e.g. a
+            page of them; defaults to all of the product's attributes.
+
+    Returns:
+        ProductResponse: The product response.
+    """
     return ProductResponse(
         id=product.id,
         name=product.name,
@@ -145,7 +447,7 @@ async def get_product(
                     for val in attr.values
                 ],
             )
-            for attr in paginated_attributes
+            for attr in (product.attributes if attributes is None else attributes)
         ],
         pricings=[
             PricingResponse(
@@ -158,8 +460,322 @@ async def get_product(
     )
 
 
+def _load_product(
+    db: Session, product_id: int, start: int, end: int
+) -> ProductResponse:
+    """Load a product from the database and build its response.
+
+    Runs in a worker thread so the event loop stays free while Postgres works.
+    """
+    # Optimized query with eager loading and pagination
+    stmt = product_detail_stmt(product_id)
+    product = db.execute(stmt).scalars().first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    # Paginate attributes
+    return _product_response(product, product.attributes[start:end])
+
+
+def _load_product_list(
+    db: Session,
+    region: str | None,
+    rental_period: int | None,
+    offset: int,
+    limit: int,
+) -> ProductListResponse:
+    """Load a page of products from the database and build its response.
+
+    Runs in a worker thread so the event loop stays free while Postgres works.
+    """
+    # Get total count for pagination
+    total = len(db.scalars(product_count_stmt(region, rental_period)).unique().all())
+
+    # Apply pagination
+    stmt = product_list_stmt(region, rental_period, offset, limit)
+    products = db.scalars(stmt).unique().all()
+
+    return ProductListResponse(
+        items=[_product_response(product) for product in products],
+        total=total,
+    )
+
+
+def _load_facets(
+    db: Session, region: str | None, rental_period: int | None
+) -> FacetsResponse:
+    """Return facet counts, recomputing them only if the catalog changed.
+
+    Runs in a worker thread so the event loop stays free while Postgres works.
+    """
+    version = db.scalar(catalog_version_stmt()) or 0
+    cached = facets_cache.get((region, rental_period), version)
+    if cached is not None:
+        return cached
+
+    regions: list[RegionFacet] = []
+    rental_periods: list[RentalPeriodFacet] = []
+    attributes: dict[str, list[AttributeValueFacet]] = {}
+    for row in db.execute(product_facets_stmt(region, rental_period)):
+        if row.region_set == 0:
+            if row.region is not None and row.region_count:
+                regions.append(RegionFacet(region=row.region, count=row.region_count))
+        elif row.period_set == 0:
+            if row.rental_period is not None and row.period_count:
+                rental_periods.append(
+                    RentalPeriodFacet(
+                        rental_period=row.rental_period, count=row.period_count
+                    )
+                )
+        elif (
+            row.attribute is not None and row.value is not None and row.attribute_count
+        ):
+            attributes.setdefault(row.attribute, []).append(
+                AttributeValueFacet(value=row.value, count=row.attribute_count)
+            )
+
+    response = FacetsResponse(
+        regions=sorted(regions, key=lambda facet: facet.region),
+        rental_periods=sorted(rental_periods, key=lambda facet: facet.rental_period),
+        attributes=[
+            AttributeFacet(
+                name=name, values=sorted(values, key=lambda facet: facet.value)
+            )
+            for name, values in sorted(attributes.items())
+        ],
+        version=version,
+    )
+    facets_cache.put((region, rental_period), version, response)
+    return response
+
+
+def _load_changes(
+    db: Session, after: tuple[int, int], limit: int
+) -> ProductChangesResponse:
+    """Read a batch of the change log and load the changed products.
+
+    Runs in a worker thread so the event loop stays free while Postgres works.
+
+    Raises:
+        HTTPException: 410 if entries after the cursor have been pruned.
+    """
+    entries = db.execute(product_changes_stmt(after, limit + 1)).all()
+    # Read after the entries: pruning moves this cursor in the same statement
+    # that deletes entries, so any entry missing from above shows up here.
+    pruned = tuple(db.execute(changes_pruned_through_stmt()).one())
+    if pruned > after:
+        cursor = "{}.{}".format(*pruned)
+        raise HTTPException(
+            status_code=410,
+            detail=f"Changes up to cursor {cursor} have been pruned; re-read the "
+            f"catalog from GET /products, then read the feed from since={cursor}",
+        )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Collapse each product's entries into its latest change; a product created
+    # and then modified within the batch is still reported as created.
+    changes: dict[int, ChangeKind] = {}
+    for entry in entries:
+        previous = changes.pop(entry.product_id, None)
+        if entry.change == "updated" and previous == "created":
+            changes[entry.product_id] = previous
+        else:
+            changes[entry.product_id] = entry.change
+
+    live = [product_id for product_id, change in changes.items() if change != "deleted"]
+    products = {}
+    if live:
+        stmt = products_by_id_stmt(live)
+        products = {product.id: product for product in db.scalars(stmt).unique()}
+
+    items = []
+    for product_id, change in changes.items():
+        product = products.get(product_id)
+        # A product deleted after this batch is reported by its current state
+        items.append(
+            ProductChange(
+                product_id=product_id,
+                change="deleted" if product is None else change,
+                product=None if product is None else _product_response(product),
+            )
+        )
+
+    last = entries[-1] if entries else None
+    return ProductChangesResponse(
+        changes=items,
+        next_cursor=f"{last.txid}.{last.id}" if last else "{}.{}".format(*after),
+        has_more=has_more,
+    )
+
+
+def _apply_bulk_upsert(db: Session, payload: BulkUpsertRequest) -> BulkUpsertResponse:
+    """Apply a bulk write and summarise its outcomes.
+
+    Runs in a worker thread so the event loop stays free while Postgres works.
+    """
+    started = time.perf_counter()
+    pricings = upsert_pricings(
+        db,
+        [
+            PricingRow(row.sku, row.region, row.rental_period, row.price)
+            for row in payload.pricings
+        ],
+        settings.BULK_UPSERT_BATCH_SIZE,
+    )
+    attributes = upsert_attributes(
+        db,
+        [AttributeRow(row.sku, row.name, row.values) for row in payload.attributes],
+        settings.BULK_UPSERT_BATCH_SIZE,
+    )
+    seconds = time.perf_counter() - started
+
+    outcomes: list[Outcome] = [*pricings, *attributes]
+    statuses = [outcome.status for outcome in outcomes]
+    return BulkUpsertResponse(
+        pricings=[RowOutcome(**outcome._asdict()) for outcome in pricings],
+        attributes=[RowOutcome(**outcome._asdict()) for outcome in attributes],
+        stats=BulkUpsertStats(
+            rows=len(outcomes),
+            created=statuses.count("created"),
+            updated=statuses.count("updated"),
+            unchanged=statuses.count("unchanged"),
+            failed=statuses.count("failed"),
+            seconds=round(seconds, 6),
+            rows_per_second=round(len(outcomes) / max(seconds, 1e-9), 1),
+        ),
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkUpsertResponse,
+    dependencies=[Depends(require_admin_token)],
+)
+async def bulk_upsert(
+    request: Request, payload: BulkUpsertRequest, db: Session = db_dependency
+) -> BulkUpsertResponse:
+    """Create or update prices and attribute values in bulk.
+
+    Rows are applied in batches of ``BULK_UPSERT_BATCH_SIZE``, each committed
+    on its own; a failed batch does not undo the others.
+    """
+    return await until_disconnected(request, _run_db(db, _apply_bulk_upsert, payload))
+
+
+@router.get("/changes", response_model=ProductChangesResponse)
+async def get_product_changes(
+    request: Request,
+    db: Session = db_dependency,
+    since: Annotated[
+        str | None,
+        Query(
+            pattern=r"^\d+\.\d+$",
+            description="Cursor returned as next_cursor by the previous call; "
+            "omit to read the feed from the beginning",
+        ),
+    ] = None,
+    limit: Annotated[
+        int,
+        Query(
+            ge=1,
+            le=1000,
+            description="Maximum number of change-log entries to read (max 1000)",
+            examples=[100, 500],
+        ),
+    ] = 100,
+) -> ProductChangesResponse:
+    txid, _, change_id = (since or "0.0").partition(".")
+    return await until_disconnected(
+        request, _run_db(db, _load_changes, (int(txid), int(change_id)), limit)
+    )
+
+
+@router.get("/facets", response_model=FacetsResponse)
+async def get_product_facets(
+    request: Request,
+    db: Session = db_dependency,
+    region: Annotated[
+        str | None,
+        Query(
+            description="Count products available in this region",
+            examples=["Singapore", "Malaysia"],
+        ),
+    ] = None,
+    rental_period: Annotated[
+        int | None,
+        Query(
+            description="Count products available for this rental period in months",
+            examples=[3, 6, 12],
+        ),
+    ] = None,
+) -> FacetsResponse:
+    key = (region, rental_period)
+    deadline = request_deadline(request)
+    return await until_disconnected(
+        request,
+        facets_flight.do(
+            key,
+            lambda: _run_shared(
+                db, facets_flight, key, _load_facets, region, rental_period
+            ),
+            deadline,
+        ),
+        deadline,
+    )
+
+
+@router.get("/{product_id}", response_model=ProductResponse)
+async def get_product(  # noqa: PLR0913, PLR0917
+    request: Request,
+    response: Response,
+    product_id: Annotated[
+        int, Path(description="The ID of the product to retrieve", examples=[1], ge=1)
+    ],
+    db: Session = db_dependency,
+    attributes_page: Annotated[
+        int,
+        Query(ge=1, description="Page number for attributes pagination", examples=[1]),
+    ] = 1,
+    attributes_per_page: Annotated[
+        int, Query(ge=1, description="Number of attributes per page", examples=[10])
+    ] = 10,
+) -> ProductResponse:
+    start = (attributes_page - 1) * attributes_per_page
+    end = start + attributes_per_page
+
+    # Serve from the shared catalog snapshot when snapshot mode is enabled,
+    # telling the client how far behind the database it may be
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None:
+        data = snapshot.get_product(product_id)
+        if data is None:
+            raise HTTPException(
+                status_code=404, detail="Product not found", headers=snapshot.headers
+            )
+        response.headers.update(snapshot.headers)
+        data["attributes"] = data["attributes"][start:end]
+        return ProductResponse.model_validate(data)
+
+    key = (product_id, start, end)
+    deadline = request_deadline(request)
+    return await until_disconnected(
+        request,
+        product_flight.do(
+            key,
+            lambda: _run_shared(
+                db, product_flight, key, _load_product, product_id, start, end
+            ),
+            deadline,
+        ),
+        deadline,
+    )
+
+
 @router.get("", response_model=ProductListResponse)
-async def list_products(
+async def list_products(  # noqa: PLR0913, PLR0917
+    request: Request,
+    response: Response,
     db: Session = db_dependency,
     region: Annotated[
         str | None,
@@ -189,74 +805,36 @@ async def list_products(
         ),
     ] = 10,
 ) -> ProductListResponse:
-    # Start with base query
-    stmt = select(Product).options(
-        joinedload(Product.attributes).joinedload(Attribute.values),
-        joinedload(Product.pricings).joinedload(ProductPricing.rental_period),
-        joinedload(Product.pricings).joinedload(ProductPricing.region),
-    )
-
-    # Apply filters if provided
-    filters_applied = False
-
-    if region is not None:
-        if not filters_applied:
-            stmt = stmt.join(ProductPricing)
-            filters_applied = True
-        stmt = stmt.join(Region).filter(Region.name == region)
+    offset = (page - 1) * per_page
 
-    if rental_period is not None:
-        if not filters_applied:
-            stmt = stmt.join(ProductPricing)
-        stmt = stmt.join(RentalPeriod).filter(
-            RentalPeriod.duration_months == rental_period
+    # Serve from the shared catalog snapshot when snapshot mode is enabled,
+    # telling the client how far behind the database it may be
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None:
+        response.headers.update(snapshot.headers)
+        items, total = snapshot.list_products(region, rental_period, offset, per_page)
+        return ProductListResponse(
+            items=[ProductResponse.model_validate(item) for item in items],
+            total=total,
         )
 
-    # Get total count for pagination
-    count_stmt = select(Product)
-    if filters_applied:
-        count_stmt = count_stmt.join(ProductPricing)
-        if region is not None:
-            count_stmt = count_stmt.join(Region).filter(Region.name == region)
-        if rental_period is not None:
-            count_stmt = count_stmt.join(RentalPeriod).filter(
-                RentalPeriod.duration_months == rental_period
-            )
-    total = len(db.scalars(count_stmt).unique().all())
-
-    # Apply pagination
-    offset = (page - 1) * per_page
-    stmt = stmt.offset(offset).limit(per_page)
-    products = db.scalars(stmt).unique().all()
-
-    return ProductListResponse(
-        items=[
-            ProductResponse(
-                id=product.id,
-                name=product.name,
-                description=product.description,
-                sku=product.sku,
-                attributes=[
-                    AttributeResponse(
-                        id=attr.id,
-                        name=attr.name,
-                        values=[
-                            AttributeValueResponse(id=val.id, value=val.value)
-                            for val in attr.values
-                        ],
-                    )
-                    for attr in product.attributes
-                ],
-                pricings=[
-                    PricingResponse(
-                        rental_period=pricing.rental_period.duration_months,
-                        region=pricing.region.name,
-                        price=pricing.price,
-                    )
-                    for pricing in product.pricings
-                ],
-            )
-            for product in products
-        ],
-        total=total,
+    key = (region, rental_period, offset, per_page)
+    deadline = request_deadline(request)
+    return await until_disconnected(
+        request,
+        product_list_flight.do(
+            key,
+            lambda: _run_shared(
+                db,
+                product_list_flight,
+                key,
+                _load_product_list,
+                region,
+                rental_period,
+                offset,
+                per_page,
+            ),
+            deadline,
+        ),
+        deadline,
     )
@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session, sessionmaker
 
 from alembic.command import upgrade
 from alembic.config import Config
+from app.core.coalescing import SingleFlight
 from app.db.database import Base  # Added import for Base
 
 
@@ -98,6 +99,15 @@ def setup_test_db() -> Iterator[None]:
     Base.metadata.drop_all(engine)
 
 
+@pytest.fixture(autouse=True)
+def restore_flight_registry() -> Iterator[None]:
+    """Unregister the flights a test creates, so metrics only list the app's."""
+    registry = dict(SingleFlight.registry)
+    yield
+    SingleFlight.registry.clear()
+    SingleFlight.registry.update(registry)
+
+
 @pytest.fixture
 def db_session() -> Iterator[Session]:
     """Create a new database session for a test."""
@@ -0,0 +1,58 @@
+"""Tests for admission control."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.admission import AdmissionController
+
+
+async def hold(controller: AdmissionController, seconds: float) -> None:
+    """Occupy a slot for ``seconds``."""
+    async with controller.slot():
+        await asyncio.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_queued_request_is_admitted_when_slot_frees() -> None:
+    """Test that a waiting request gets the slot released by another."""
+    controller = AdmissionController(1, max_queue=1, max_wait=1, retry_after=1)
+
+    await asyncio.gather(hold(controller, 0.01), hold(controller, 0))
+
+    assert (controller.admitted, controller.queued) == (2, 1)
+    assert (controller.active, controller.waiting) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_shed_with_retry_after() -> None:
+    """Test that requests beyond the queue bound are rejected immediately."""
+    controller = AdmissionController(1, max_queue=0, max_wait=1, retry_after=3)
+    holder = asyncio.ensure_future(hold(controller, 0.01))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await hold(controller, 0)
+
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers == {"Retry-After": "3"}
+    assert controller.rejected == 1
+    await holder
+
+
+@pytest.mark.asyncio
+async def test_wait_longer_than_max_wait_is_shed() -> None:
+    """Test that a request waiting past max_wait is rejected and not admitted."""
+    controller = AdmissionController(1, max_queue=1, max_wait=0.01, retry_after=1)
+    holder = asyncio.ensure_future(hold(controller, 0.05))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException):
+        await hold(controller, 0)
+
+    await holder
+    assert controller.timed_out == 1
+    assert controller.active == 0
@@ -0,0 +1,137 @@
+"""Tests for single-flight request coalescing."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.coalescing import SingleFlight
+from app.core.config import settings
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_fetch() -> None:
+    """Test that concurrent callers with the same key run a single fetch."""
+    flight = SingleFlight("test_share")
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    assert results == [42] * 5
+    assert calls == 1
+    assert (flight.leaders, flight.coalesced, flight.in_flight) == (1, 4, 0)
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_is_shared_and_released() -> None:
+    """Test that a failure reaches every waiter and the next call retries."""
+    flight = SingleFlight("test_failure")
+
+    async def fail() -> int:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database unavailable")
+
+    results = await asyncio.gather(
+        *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.failures == 1
+
+    async def succeed() -> int:
+        return 7
+
+    assert await flight.do("key", succeed) == 7
+    assert flight.leaders == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_fetch() -> None:
+    """Test that a cancelled caller leaves the shared fetch running."""
+    flight = SingleFlight("test_cancel")
+
+    async def fetch() -> str:
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("key", fetch))
+    second = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_fetch_is_abandoned_when_last_waiter_leaves() -> None:
+    """Test that the fetch is cancelled once nobody is waiting for it."""
+    flight = SingleFlight("test_abandon")
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def fetch() -> str:
+        started.set()
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "done"
+
+    waiter = asyncio.ensure_future(flight.do("key", fetch))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    assert flight.abandoned == 1
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_is_latest_of_current_waiters() -> None:
+    """Test that the shared fetch sees the latest deadline of its waiters."""
+    flight = SingleFlight("test_deadline")
+    release = asyncio.Event()
+
+    async def fetch() -> str:
+        await release.wait()
+        return "done"
+
+    short = asyncio.ensure_future(flight.do("key", fetch, 10.0))
+    await asyncio.sleep(0)
+    assert flight.deadline("key") == 10.0
+
+    long = asyncio.ensure_future(flight.do("key", fetch, 30.0))
+    await asyncio.sleep(0)
+    assert flight.deadline("key") == 30.0
+
+    long.cancel()
+    await asyncio.sleep(0)
+    assert flight.deadline("key") == 10.0
+
+    release.set()
+    assert await short == "done"
+    assert flight.deadline("key") is None
+
+
+def test_metrics_require_admin_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that metrics are only served to admins and list the app's flights."""
+    SingleFlight("test_metrics")
+    client = TestClient(app)
+    assert client.get("/admin/metrics").status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    response = client.get("/admin/metrics", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "test_metrics" in response.json()["coalescing"]
+    assert "get_product" in response.json()["coalescing"]
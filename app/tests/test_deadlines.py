@@ -0,0 +1,44 @@
+"""Tests for per-request deadlines."""
+
+from __future__ import annotations
+
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.deadlines import DEADLINE_HEADER, remaining_ms, request_deadline
+
+app = FastAPI()
+
+
+@app.get("/budget")
+async def budget(request: Request) -> dict[str, int]:
+    return {"remaining_ms": remaining_ms(request_deadline(request))}
+
+
+def test_default_deadline_applies_without_header() -> None:
+    """Test that requests get the configured default budget."""
+    remaining = TestClient(app).get("/budget").json()["remaining_ms"]
+
+    assert settings.REQUEST_TIMEOUT_MS - 1000 < remaining <= settings.REQUEST_TIMEOUT_MS
+
+
+def test_header_deadline_is_capped() -> None:
+    """Test that clients can shorten the budget but not exceed the maximum."""
+    client = TestClient(app)
+
+    short = client.get("/budget", headers={DEADLINE_HEADER: "50"})
+    assert short.json()["remaining_ms"] <= 50
+
+    huge = client.get("/budget", headers={DEADLINE_HEADER: "999999999"})
+    assert huge.json()["remaining_ms"] <= settings.REQUEST_TIMEOUT_MAX_MS
+
+    invalid = client.get("/budget", headers={DEADLINE_HEADER: "soon"})
+    assert invalid.json()["remaining_ms"] > 50
+
+
+def test_remaining_ms_never_negative() -> None:
+    """Test that an expired deadline reports zero remaining time."""
+    assert remaining_ms(time.monotonic() - 1) == 0
@@ -2,16 +2,31 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
 from collections.abc import Iterator
+from datetime import timedelta
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session, sessionmaker
 
-from app.db.database import Base, get_db
+from app.core.admission import admission_controller
+from app.core.config import settings
+from app.db.database import Base, SessionLocal, cancel_query, get_db
+from app.db.maintenance import (
+    MAINTENANCE_LOCK_KEY,
+    compact_catalog_writes,
+    prune_catalog_changes,
+    run_maintenance,
+)
+from app.db.partitions import attach_missing_partitions
+from app.db.queries import product_count_stmt, product_list_stmt
 from app.main import app
+from app.routers import products
 from app.tests.conftest import get_test_db_url
 
 engine = create_engine(get_test_db_url())
@@ -88,6 +103,53 @@ async def test_get_product(client: TestClient, db: Session) -> None:
     assert response.json()["pricings"][0]["price"] == 100.0
 
 
+@pytest.mark.asyncio
+async def test_session_closed_before_slot_released(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a request's connection is back in the pool before its slot is.
+
+    Args:
+        client (TestClient): The test client fixture.
+        db (Session): The database session fixture.
+        monkeypatch (pytest.MonkeyPatch): Used to observe the session closing.
+    """
+    with engine.connect() as connection:
+        seed_test_data(connection)
+    active_on_close = []
+    close = db.close
+
+    def record_close() -> None:
+        active_on_close.append(admission_controller.active)
+        close()
+
+    monkeypatch.setattr(db, "close", record_close)
+
+    response = client.get("/products/changes")
+    assert response.status_code == 200
+    assert active_on_close[0] == 1
+    assert admission_controller.active == 0
+
+
+def test_connection_forgotten_before_checkin(db: Session) -> None:
+    """Test that a session's raw connection cannot be cancelled once pooled.
+
+    Args:
+        db (Session): The database session fixture.
+    """
+    session = SessionLocal(bind=engine)
+    session.execute(text("SELECT 1"))
+    assert session.info["dbapi_connection"] is not None
+
+    # Committing and closing both hand the connection back to the pool
+    session.commit()
+    assert "dbapi_connection" not in session.info
+    session.execute(text("SELECT 1"))
+    session.close()
+    assert "dbapi_connection" not in session.info
+    cancel_query(session)
+
+
 @pytest.mark.asyncio
 async def test_list_products(client: TestClient, db: Session) -> None:
     """Test listing and filtering products.
@@ -137,3 +199,356 @@ async def test_list_products(client: TestClient, db: Session) -> None:
             pricing["region"] == "Singapore" and pricing["rental_period"] == 3
             for pricing in item["pricings"]
         )
+
+
+@pytest.mark.asyncio
+async def test_product_facets(client: TestClient, db: Session) -> None:
+    """Test counting products per region, rental period and attribute value.
+
+    Tests the GET /products/facets endpoint, including that cached counts are
+    invalidated once the catalog changes.
+
+    Args:
+        client (TestClient): The test client fixture.
+        db (Session): The database session fixture.
+    """
+    with engine.connect() as connection:
+        seed_test_data(connection)
+
+    response = client.get("/products/facets")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["regions"] == [{"region": "Singapore", "count": 1}]
+    assert data["rental_periods"] == [{"rental_period": 3, "count": 1}]
+    assert data["attributes"] == [
+        {"name": "Color", "values": [{"value": "Black", "count": 1}]}
+    ]
+
+    # A region filter does not hide the other regions' counts
+    response = client.get("/products/facets?region=Malaysia")
+    data = response.json()
+    assert data["regions"] == [{"region": "Singapore", "count": 1}]
+    assert data["rental_periods"] == []
+    assert data["attributes"] == []
+
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO regions (id, name) VALUES (2, 'Malaysia')")
+        )
+        connection.execute(
+            text(
+                "INSERT INTO product_pricings "
+                "(id, product_id, rental_period_id, region_id, price) "
+                "VALUES (2, 1, 1, 2, 90.0)"
+            )
+        )
+
+    response = client.get("/products/facets?region=Malaysia")
+    data = response.json()
+    assert data["regions"] == [
+        {"region": "Malaysia", "count": 1},
+        {"region": "Singapore", "count": 1},
+    ]
+    assert data["rental_periods"] == [{"rental_period": 3, "count": 1}]
+
+    # Compacting the write log changes neither the version nor the counts
+    version = data["version"]
+    with engine.connect() as connection:
+        assert compact_catalog_writes(connection) > 0
+        assert compact_catalog_writes(connection) == 0
+    response = client.get("/products/facets?region=Malaysia")
+    assert response.json() == data
+
+    # A product priced in several regions and with several values of an
+    # attribute is still counted once per facet value
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO attribute_values (attribute_id, value) VALUES (1, 'Red')")
+        )
+    data = client.get("/products/facets").json()
+    assert data["version"] == version + 1
+    assert data["regions"] == [
+        {"region": "Malaysia", "count": 1},
+        {"region": "Singapore", "count": 1},
+    ]
+    assert data["rental_periods"] == [{"rental_period": 3, "count": 1}]
+    assert data["attributes"] == [
+        {
+            "name": "Color",
+            "values": [{"value": "Black", "count": 1}, {"value": "Red", "count": 1}],
+        }
+    ]
+
+
+def test_maintenance_runs_in_one_process_at_a_time(db: Session) -> None:
+    """Test that maintenance compacts the write log unless it is already running.
+
+    Args:
+        db (Session): The database session fixture.
+    """
+    with engine.connect() as connection:
+        seed_test_data(connection)
+        connection.execute(
+            text("SELECT pg_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+        )
+        assert run_maintenance(engine) is False
+        connection.execute(
+            text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+        )
+        connection.commit()
+
+    assert run_maintenance(engine) is True
+    with engine.connect() as connection:
+        pending = connection.execute(text("SELECT count(*) FROM catalog_writes"))
+        assert pending.scalar_one() == 0
+
+
+async def test_coalesced_fetch_outlives_leader(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a request joining a fetch is unaffected by its leader timing out.
+
+    Args:
+        client (TestClient): The test client fixture.
+        db (Session): The database session fixture.
+        monkeypatch (pytest.MonkeyPatch): Used to slow the product fetch down.
+    """
+    with engine.connect() as connection:
+        seed_test_data(connection)
+
+    load_product = products._load_product
+
+    def slow_load_product(
+        db: Session, product_id: int, start: int, end: int
+    ) -> products.ProductResponse:
+        time.sleep(0.3)
+        return load_product(db, product_id, start, end)
+
+    monkeypatch.setattr(products, "_load_product", slow_load_product)
+    coalesced = products.product_flight.coalesced
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        leader = asyncio.ensure_future(
+            http.get("/products/1", headers={"X-Request-Timeout-Ms": "100"})
+        )
+        await asyncio.sleep(0.05)
+        follower = await http.get("/products/1")
+        assert (await leader).status_code == 504
+
+    assert follower.status_code == 200
+    assert follower.json()["sku"] == "LAP123"
+    assert products.product_flight.coalesced == coalesced + 1
+
+
+def scanned_relations(plan: dict) -> set[str]:
+    """Return the tables an EXPLAIN ANALYZE plan node and its children read."""
+    relations = set()
+    if plan.get("Actual Loops", 0) > 0 and "Relation Name" in plan:
+        relations.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relations |= scanned_relations(child)
+    return relations
+
+
+def plan_nodes(plan: dict, node_type: str) -> list[dict]:
+    """Return the nodes of an EXPLAIN plan of the given type."""
+    nodes = [plan] if plan["Node Type"] == node_type else []
+    for child in plan.get("Plans", []):
+        nodes += plan_nodes(child, node_type)
+    return nodes
+
+
+def test_region_filter_prunes_partitions(db: Session) -> None:
+    """Test that a region filter only reads the partition of that region.
+
+    Args:
+        db (Session): The database session fixture.
+    """
+    with engine.connect() as connection:
+        seed_test_data(connection)
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO regions (id, name) VALUES (2, 'Malaysia')")
+        )
+        connection.execute(
+            text(
+                "INSERT INTO product_pricings "
+                "(id, product_id, rental_period_id, region_id, price) "
+                "VALUES (2, 1, 1, 2, 90.0)"
+            )
+        )
+    # Both regions' pricings start out in the default partition
+    with engine.connect() as connection:
+        assert attach_missing_partitions(connection) == [1, 2]
+        assert attach_missing_partitions(connection) == []
+        moved = connection.exec_driver_sql(
+            "SELECT tableoid::regclass::text, count(*) FROM product_pricings "
+            "GROUP BY 1 ORDER BY 1"
+        ).all()
+    assert moved == [("product_pricings_r1", 1), ("product_pricings_r2", 1)]
+
+    sql = product_count_stmt("Singapore", None).compile(
+        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    with engine.connect() as connection:
+        [explain] = connection.exec_driver_sql(
+            f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"
+        ).scalar_one()
+
+    pricing_tables = {
+        relation
+        for relation in scanned_relations(explain["Plan"])
+        if relation.startswith("product_pricings")
+    }
+    assert pricing_tables == {"product_pricings_r1"}
+
+    # The page of a listing is selected from the region's partition only; the
+    # pricings eager-loaded for its products come from every region.
+    sql = product_list_stmt("Singapore", None, 0, 10).compile(
+        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    with engine.connect() as connection:
+        [explain] = connection.exec_driver_sql(
+            f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"
+        ).scalar_one()
+    [page] = plan_nodes(explain["Plan"], "Limit")
+    assert {
+        relation
+        for relation in scanned_relations(page)
+        if relation.startswith("product_pricings")
+    } == {"product_pricings_r1"}
+    assert "product_pricings_r2" in scanned_relations(explain["Plan"])
+
+
+@pytest.mark.asyncio
+async def test_product_changes(client: TestClient, db: Session) -> None:
+    """Test reading created, updated and deleted products from the change feed.
+
+    Args:
+        client (TestClient): The test client fixture.
+        db (Session): The database session fixture.
+    """
+    with engine.connect() as connection:
+        seed_test_data(connection)
+
+    response = client.get("/products/changes")
+    assert response.status_code == 200
+    data = response.json()
+    assert [(c["product_id"], c["change"]) for c in data["changes"]] == [(1, "created")]
+    assert data["changes"][0]["product"]["sku"] == "LAP123"
+    assert data["has_more"] is False
+    cursor = data["next_cursor"]
+
+    # Nothing changed since the cursor
+    data = client.get(f"/products/changes?since={cursor}").json()
+    assert data["changes"] == []
+    assert data["next_cursor"] == cursor
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE product_pricings SET price = 80.0"))
+    data = client.get(f"/products/changes?since={cursor}").json()
+    assert [(c["product_id"], c["change"]) for c in data["changes"]] == [(1, "updated")]
+    assert data["changes"][0]["product"]["pricings"][0]["price"] == 80.0
+    cursor = data["next_cursor"]
+
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM product_pricings"))
+        connection.execute(text("DELETE FROM attribute_values"))
+        connection.execute(text("DELETE FROM attributes"))
+        connection.execute(text("DELETE FROM products"))
+    data = client.get(f"/products/changes?since={cursor}&limit=1").json()
+    assert [(c["product_id"], c["change"]) for c in data["changes"]] == [(1, "deleted")]
+    assert data["changes"][0]["product"] is None
+    assert data["has_more"] is True
+
+    response = client.get("/products/changes?since=not-a-cursor")
+    assert response.status_code == 422
+
+    # Entries within the retention window are kept
+    with engine.connect() as connection:
+        assert prune_catalog_changes(connection, timedelta(days=1)) == 0
+    assert client.get(f"/products/changes?since={cursor}").status_code == 200
+
+    # Pruned cursors are rejected instead of silently skipping changes
+    with engine.connect() as connection:
+        assert prune_catalog_changes(connection, timedelta(0), batch_size=2) > 0
+    response = client.get(f"/products/changes?since={cursor}")
+    assert response.status_code == 410
+    assert client.get("/products/changes").status_code == 410
+    oldest = response.json()["detail"].split("since=")[1]
+    data = client.get(f"/products/changes?since={oldest}").json()
+    assert data["changes"] == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test writing prices and attribute values in bulk.
+
+    Tests the POST /products/bulk endpoint, including per-row outcomes for
+    created, updated, unchanged, superseded and failed rows.
+
+    Args:
+        client (TestClient): The test client fixture.
+        db (Session): The database session fixture.
+        monkeypatch (pytest.MonkeyPatch): Used to configure the admin token.
+    """
+    with engine.connect() as connection:
+        seed_test_data(connection)
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO rental_periods (id, duration_months) VALUES (2, 6)")
+        )
+    payload = {
+        "pricings": [
+            {"sku": "LAP123", "region": "Singapore", "rental_period": 3, "price": 1},
+            {"sku": "LAP123", "region": "Singapore", "rental_period": 3, "price": 90},
+            {"sku": "LAP123", "region": "Singapore", "rental_period": 6, "price": 70},
+            {"sku": "NOPE", "region": "Singapore", "rental_period": 3, "price": 90},
+        ],
+        "attributes": [
+            {"sku": "LAP123", "name": "Color", "values": ["White", "Black"]},
+            {"sku": "LAP123", "name": "Storage", "values": ["512GB"]},
+        ],
+    }
+
+    assert client.post("/products/bulk", json=payload).status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+    response = client.post("/products/bulk", json=payload, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [row["status"] for row in data["pricings"]] == [
+        "superseded",
+        "updated",
+        "created",
+        "failed",
+    ]
+    assert data["pricings"][3]["detail"] == "Unknown sku 'NOPE'"
+    assert [row["status"] for row in data["attributes"]] == ["updated", "created"]
+    assert data["stats"]["rows"] == 6
+    assert data["stats"]["failed"] == 1
+
+    product = client.get("/products/1").json()
+    assert sorted(
+        (p["region"], p["rental_period"], p["price"]) for p in product["pricings"]
+    ) == [("Singapore", 3, 90.0), ("Singapore", 6, 70.0)]
+    assert {
+        attr["name"]: sorted(value["value"] for value in attr["values"])
+        for attr in product["attributes"]
+    } == {"Color": ["Black", "White"], "Storage": ["512GB"]}
+
+    # Re-applying the same rows changes nothing
+    response = client.post("/products/bulk", json=payload, headers=headers)
+    data = response.json()
+    assert [row["status"] for row in data["pricings"][1:3]] == [
+        "unchanged",
+        "unchanged",
+    ]
+    assert [row["status"] for row in data["attributes"]] == [
+        "unchanged",
+        "unchanged",
+    ]
@@ -0,0 +1,112 @@
+"""Tests for per-request profiling."""
+
+from __future__ import annotations
+
+import cProfile
+import pstats
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.profiling import (
+    PROFILE_ID_HEADER,
+    ProfileStore,
+    ProfilingMiddleware,
+    RequestProfile,
+    in_request_profile,
+)
+
+
+def busy_work() -> int:
+    """Do some work that shows up in a profile."""
+    return sum(range(1000))
+
+
+def make_app(store: ProfileStore) -> FastAPI:
+    """Build an app whose only endpoint hands work to a worker thread."""
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, store=store)
+
+    @app.get("/work")
+    async def work() -> dict[str, int]:
+        return {"result": await run_in_threadpool(in_request_profile(busy_work))}
+
+    return app
+
+
+def test_unprofiled_work_is_not_wrapped() -> None:
+    """Test that work outside a profiled request runs as is."""
+    assert in_request_profile(busy_work) is busy_work
+
+
+def test_store_keeps_newest_profiles(tmp_path: Path) -> None:
+    """Test saving, loading and pruning stored profiles."""
+    store = ProfileStore(tmp_path, keep=2)
+    profiles = [RequestProfile("GET", f"/products/{i}") for i in range(3)]
+    for profile in profiles:
+        profile.call(busy_work)
+        profile.record_statement("SELECT 1", {}, 0.002)
+        store.save(profile, 200, 0.01)
+
+    assert {p["id"] for p in store.list()} == {profiles[1].id, profiles[2].id}
+    assert store.load(profiles[0].id) is None
+    saved = store.load(profiles[2].id)
+    assert saved is not None
+    assert (saved["statement_count"], saved["sql_ms"]) == (1, 2.0)
+    assert store.load("../../etc/passwd") is None
+
+
+def test_admin_request_is_profiled(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that only admin requests asking for a profile are profiled."""
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    store = ProfileStore(tmp_path, keep=10)
+    client = TestClient(make_app(store))
+
+    response = client.get("/work", headers={"X-Profile": "1"})
+    assert PROFILE_ID_HEADER not in response.headers
+
+    response = client.get(
+        "/work", headers={"X-Profile": "1", "X-Admin-Token": "secret"}
+    )
+    assert response.json() == {"result": 499500}
+    profile_id = response.headers[PROFILE_ID_HEADER]
+
+    path = store.stats_path(profile_id)
+    assert path is not None
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}  # type: ignore
+    assert "busy_work" in functions
+
+
+def test_request_is_served_when_profiler_cannot_nest(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test profiling where only one profiler may be active, as from Python 3.12."""
+    enable = cProfile.Profile.enable
+    active: list[cProfile.Profile] = []
+
+    def enable_once(self: cProfile.Profile) -> None:
+        if active:
+            raise ValueError("Another profiling tool is already active")
+        active.append(self)
+        enable(self)
+
+    monkeypatch.setattr(cProfile.Profile, "enable", enable_once)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    client = TestClient(make_app(ProfileStore(tmp_path, keep=10)))
+    headers = {"X-Profile": "1", "X-Admin-Token": "secret"}
+
+    # The worker thread's profiler cannot be enabled inside the request's
+    response = client.get("/work", headers=headers)
+    assert response.json() == {"result": 499500}
+    assert PROFILE_ID_HEADER in response.headers
+
+    # Nor can the request's while another profiler is still active
+    response = client.get("/work", headers=headers)
+    assert response.json() == {"result": 499500}
+    assert PROFILE_ID_HEADER not in response.headers
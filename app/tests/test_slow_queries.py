@@ -0,0 +1,124 @@
+"""Tests for the slow-query log."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.database import Base
+from app.db.slow_queries import SlowQueryLog, slow_query_log
+from app.main import app
+from app.tests.conftest import get_test_db_url
+
+
+@pytest.fixture
+def engine() -> Iterator[Engine]:
+    """Create an engine of its own, so listeners do not outlive the test."""
+    engine = create_engine(get_test_db_url())
+    yield engine
+    engine.dispose()
+
+
+def test_slow_select_is_logged_and_explained(
+    engine: Engine, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that a slow SELECT is logged with its route and its plan captured."""
+    log = SlowQueryLog(
+        threshold_ms=0, sample_rate=1.0, plans_kept=10, explain_timeout_ms=5000
+    )
+    log.install(engine)
+    try:
+        with engine.connect() as conn:
+            conn.info["route"] = "GET /products"
+            conn.execute(text("SELECT pg_sleep(0.01), :value AS value"), {"value": 1})
+
+        deadline = time.monotonic() + 10
+        while log.explained + log.explain_failures == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        log.close()
+
+    assert log.slow_queries >= 1
+    assert "GET /products" in caplog.text
+    [plan] = log.recent_plans()
+    assert plan.route == "GET /products"
+    assert "Execution Time" in plan.plan
+
+
+def test_fast_statements_are_ignored(engine: Engine) -> None:
+    """Test that statements under the threshold are neither logged nor explained."""
+    log = SlowQueryLog(
+        threshold_ms=10_000, sample_rate=1.0, plans_kept=10, explain_timeout_ms=5000
+    )
+    log.install(engine)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    finally:
+        log.close()
+
+    assert (log.slow_queries, log.explained) == (0, 0)
+
+
+def test_statements_still_run_after_close(engine: Engine) -> None:
+    """Test that a closed log drops samples instead of failing the statement."""
+    log = SlowQueryLog(
+        threshold_ms=0, sample_rate=1.0, plans_kept=10, explain_timeout_ms=5000
+    )
+    log.install(engine)
+    log.close()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar_one() == 1
+
+    assert log.explains_dropped == 1
+    assert log.explained == 0
+
+
+def test_slow_queries_endpoint_reports_request_routes(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the application's slow queries reach the admin endpoint.
+
+    The statements run through ``get_db`` like any request's, so their route
+    comes from the session; only the newest plans are kept.
+    """
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    monkeypatch.setattr(slow_query_log, "sample_rate", 1.0)
+    monkeypatch.setattr(slow_query_log, "plans", deque(maxlen=2))
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    explained = slow_query_log.explained
+    client = TestClient(app)
+    try:
+        assert client.get("/products/1").status_code == 404
+        assert client.get("/products?region=Singapore").status_code == 200
+
+        deadline = time.monotonic() + 10
+        while slow_query_log.explained < explained + 3:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        response = client.get(
+            "/admin/slow-queries", headers={"X-Admin-Token": "secret"}
+        )
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+    assert response.status_code == 200
+    plans = response.json()["plans"]
+    assert len(plans) == 2
+    assert {plan["route"] for plan in plans} <= {
+        "GET /products/{product_id}",
+        "GET /products",
+    }
+    assert all("Execution Time" in plan["plan"] for plan in plans)
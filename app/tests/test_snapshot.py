@@ -0,0 +1,147 @@
+"""Tests for the memory-mapped catalog snapshot."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.database import Base
+from app.db.snapshot import (
+    CatalogSnapshot,
+    SnapshotReader,
+    rebuild_if_stale,
+    snapshot_version,
+    write_snapshot,
+)
+from app.tests.conftest import get_test_db_url
+
+engine = create_engine(get_test_db_url())
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    """Create a session over a freshly seeded catalog.
+
+    Yields:
+        Iterator[Session]: A SQLAlchemy session for test database operations.
+    """
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection, open("scripts/seed_test_data.sql") as file:
+        connection.execute(text(file.read()))
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_snapshot_round_trip(db: Session, tmp_path: Path) -> None:
+    """Test that a written snapshot serves products and filtered listings.
+
+    Args:
+        db (Session): The database session fixture.
+        tmp_path (Path): Directory for the snapshot file.
+    """
+    path = str(tmp_path / "catalog.snap")
+    version = write_snapshot(db, path)
+
+    snapshot = CatalogSnapshot(path)
+    assert snapshot.version == version
+    assert len(snapshot) == 1
+
+    product = snapshot.get_product(1)
+    assert product is not None
+    assert product["name"] == "Laptop"
+    assert product["attributes"][0]["values"][0]["value"] == "Black"
+    assert product["pricings"] == [
+        {"rental_period": 3, "region": "Singapore", "price": 100.0}
+    ]
+    assert snapshot.get_product(2) is None
+
+    items, total = snapshot.list_products("Singapore", 3, 0, 10)
+    assert total == 1
+    assert items[0]["sku"] == "LAP123"
+    assert snapshot.list_products("Malaysia", None, 0, 10) == ([], 0)
+
+
+def test_reader_swaps_to_rebuilt_snapshot(db: Session, tmp_path: Path) -> None:
+    """Test that the reader picks up a replaced snapshot file.
+
+    Args:
+        db (Session): The database session fixture.
+        tmp_path (Path): Directory for the snapshot file.
+    """
+    path = str(tmp_path / "catalog.snap")
+    reader = SnapshotReader(path, check_interval=0)
+    assert reader.current() is None
+
+    first = write_snapshot(db, path)
+    snapshot = reader.current()
+    assert snapshot is not None
+    assert snapshot.version == first
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE product_pricings SET price = 80.0"))
+    second = write_snapshot(db, path)
+    assert second != first
+    snapshot = reader.current()
+    assert snapshot is not None
+    assert snapshot.version == second
+
+
+def test_snapshot_rebuilt_when_catalog_changes(
+    db: Session, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a snapshot is rebuilt after a write, and only then.
+
+    Args:
+        db (Session): The database session fixture.
+        tmp_path (Path): Directory for the snapshot file.
+        monkeypatch (pytest.MonkeyPatch): Points the builder at the test database.
+    """
+    monkeypatch.setattr("app.db.snapshot.SessionLocal", TestingSessionLocal)
+    path = str(tmp_path / "catalog.snap")
+    first = rebuild_if_stale(path, None)
+    assert first is not None
+    assert snapshot_version(path) == first
+    assert rebuild_if_stale(path, None) is None
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE product_pricings SET price = 80.0"))
+    second = rebuild_if_stale(path, None)
+    assert second is not None
+    assert second != first
+    product = CatalogSnapshot(path).get_product(1)
+    assert product is not None
+    assert product["pricings"][0]["price"] == 80.0
+
+    # An unchanged catalog is still rebuilt once the snapshot is too old
+    assert rebuild_if_stale(path, 0) == second
+
+
+def test_current_snapshot_checked_without_builder_lock(
+    db: Session, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that workers only contend for the builder lock once a rebuild is due.
+
+    Args:
+        db (Session): The database session fixture.
+        tmp_path (Path): Directory for the snapshot file.
+        monkeypatch (pytest.MonkeyPatch): Points the builder at the test database.
+    """
+    monkeypatch.setattr("app.db.snapshot.SessionLocal", TestingSessionLocal)
+    path = str(tmp_path / "catalog.snap")
+    assert rebuild_if_stale(path, None) is not None
+
+    def no_lock(path: str) -> None:
+        raise AssertionError("builder lock taken for a current snapshot")
+
+    monkeypatch.setattr("app.db.snapshot.builder_lock", no_lock)
+    assert rebuild_if_stale(path, None) is None
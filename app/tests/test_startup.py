@@ -0,0 +1,49 @@
+"""Tests for the startup warm-up."""
+
+from __future__ import annotations
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core.startup import StartupProfiler
+from app.db.database import Base
+from app.db.warmup import warm_up
+from app.tests.conftest import get_test_db_url
+
+
+def test_warm_up_fills_pool_and_records_steps() -> None:
+    """Test that warm-up pre-opens connections and profiles every step."""
+    engine = create_engine(get_test_db_url(), pool_size=3)
+    Base.metadata.create_all(bind=engine)
+    profiler = StartupProfiler()
+
+    try:
+        warm_up(engine, sessionmaker(bind=engine), 3, profiler)
+
+        assert [name for name, _ in profiler.steps] == [
+            "configure mappers",
+            "prewarm pool",
+            "warm statement cache",
+        ]
+        assert isinstance(engine.pool, QueuePool)
+        assert engine.pool.checkedin() == 3
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_imports_are_recorded_per_statement() -> None:
+    """Test that each import in an imports() block is its own step."""
+    profiler = StartupProfiler()
+
+    with profiler.imports():
+        import json  # noqa: F401, PLC0415
+        from email import message  # noqa: F401, PLC0415
+        from email.message import Message  # noqa: F401, PLC0415
+
+    assert [name for name, _ in profiler.steps] == [
+        "import json",
+        "import email.message",
+        "import email.message",
+    ]
@@ -0,0 +1,197 @@
+"""Benchmark partition pruning of region-filtered pricing queries.
+
+Builds two temporary copies of a synthetic ``product_pricings`` table with the
+same rows: one unpartitioned with an index on ``region_id``, as the table was
+before it was partitioned, and one list-partitioned on ``region_id`` like the
+table is now. Each query is then timed against both copies and reported with
+the tables it read and the buffers it touched, from ``EXPLAIN (ANALYZE,
+BUFFERS)``. Everything is created in a transaction that is rolled back, so the
+database is left as it was.
+
+Queries:
+    region_id: ``WHERE region_id = <literal>``, pruned while planning.
+    region_name: the shape ``list_products`` uses for its region filter,
+        comparing ``region_id`` with a subquery looking the name up, pruned
+        when the subquery has run.
+
+Usage:
+    DATABASE_URL=postgresql+psycopg2://... \\
+        python scripts/benchmark_partition_pruning.py --products 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Any
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+
+QUERIES = {
+    "region_id": (
+        "SELECT count(*) FROM bench_products p "
+        "JOIN {table} pp ON pp.product_id = p.id "
+        "WHERE pp.region_id = :region_id"
+    ),
+    "region_name": (
+        "SELECT count(*) FROM bench_products p "
+        "JOIN {table} pp ON pp.product_id = p.id "
+        "WHERE pp.region_id = "
+        "(SELECT id FROM bench_regions WHERE name = :region_name)"
+    ),
+}
+
+TABLES = ("bench_unpartitioned", "bench_partitioned")
+
+
+def create_tables(conn: Connection, products: int, regions: int, periods: int) -> None:
+    """Create and fill the temporary tables compared by the benchmark."""
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE bench_products AS "
+        "SELECT id FROM generate_series(1, %s) AS id",
+        (products,),
+    )
+    conn.exec_driver_sql("ALTER TABLE bench_products ADD PRIMARY KEY (id)")
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE bench_regions AS "
+        "SELECT id, 'region-' || id AS name FROM generate_series(1, %s) AS id",
+        (regions,),
+    )
+
+    columns = (
+        "id integer NOT NULL, product_id integer, rental_period_id integer, "
+        "region_id integer NOT NULL, price double precision"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE bench_unpartitioned ({columns}, PRIMARY KEY (id))"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE bench_partitioned ({columns}, "
+        "PRIMARY KEY (id, region_id)) PARTITION BY LIST (region_id)"
+    )
+    for region_id in range(1, regions + 1):
+        conn.exec_driver_sql(
+            f"CREATE TEMP TABLE bench_partitioned_r{region_id} "
+            f"PARTITION OF bench_partitioned FOR VALUES IN ({region_id})"
+        )
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE bench_partitioned_default "
+        "PARTITION OF bench_partitioned DEFAULT"
+    )
+
+    conn.exec_driver_sql(
+        "INSERT INTO bench_unpartitioned "
+        "SELECT row_number() OVER (), product_id, period, region_id, "
+        "round((random() * 100)::numeric, 2) "
+        "FROM generate_series(1, %s) AS product_id, "
+        "generate_series(1, %s) AS region_id, "
+        "generate_series(1, %s) AS period",
+        (products, regions, periods),
+    )
+    conn.exec_driver_sql(
+        "INSERT INTO bench_partitioned SELECT * FROM bench_unpartitioned"
+    )
+
+    # The indexes each layout has in the application's schema
+    for table in TABLES:
+        conn.exec_driver_sql(f"CREATE INDEX ON {table} (product_id)")
+        conn.exec_driver_sql(f"CREATE INDEX ON {table} (rental_period_id)")
+        conn.exec_driver_sql(
+            f"CREATE UNIQUE INDEX ON {table} (product_id, region_id, rental_period_id)"
+        )
+    conn.exec_driver_sql("CREATE INDEX ON bench_unpartitioned (region_id)")
+
+    # Autovacuum never analyzes temporary tables
+    for table in ("bench_products", "bench_regions", *TABLES):
+        conn.exec_driver_sql(f"ANALYZE {table}")
+
+
+def _relations(plan: dict[str, Any]) -> set[str]:
+    """Return the tables read by a plan node and its children."""
+    relations = set()
+    if plan.get("Actual Loops", 0) > 0 and "Relation Name" in plan:
+        relations.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relations |= _relations(child)
+    return relations
+
+
+def measure(
+    conn: Connection, sql: str, params: dict[str, Any], runs: int
+) -> dict[str, Any]:
+    """Time ``sql`` and explain one more run of it."""
+    statement = text(sql)
+    conn.execute(statement, params).all()  # warm up caches
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(statement, params).all()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    explain = conn.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params
+    ).scalar()
+    if isinstance(explain, str):
+        explain = json.loads(explain)
+    plan = explain[0]["Plan"]
+    # Temporary tables are read through local rather than shared buffers
+    buffers = sum(
+        plan.get(f"{kind} {op} Blocks", 0)
+        for kind in ("Shared", "Local")
+        for op in ("Hit", "Read")
+    )
+    return {
+        "median_ms": statistics.median(timings),
+        "max_ms": max(timings),
+        "buffers": buffers,
+        "relations": sorted(_relations(plan) - {"bench_products", "bench_regions"}),
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print one line per query and table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--regions", type=int, default=8)
+    parser.add_argument("--periods", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    if not args.url:
+        parser.error("pass --url or set DATABASE_URL")
+
+    engine = create_engine(args.url)
+    region_id = (args.regions + 1) // 2
+    params = {"region_id": region_id, "region_name": f"region-{region_id}"}
+    with engine.connect() as conn:
+        try:
+            started = time.perf_counter()
+            create_tables(conn, args.products, args.regions, args.periods)
+            print(
+                f"{args.products * args.regions * args.periods} pricings in "
+                f"{args.regions} regions, built in "
+                f"{time.perf_counter() - started:.1f}s; querying region {region_id}"
+            )
+            print(
+                f"{'query':<12} {'table':<20} {'median ms':>10} {'max ms':>8} "
+                f"{'buffers':>8}  tables read"
+            )
+            for name, sql in QUERIES.items():
+                for table in TABLES:
+                    result = measure(conn, sql.format(table=table), params, args.runs)
+                    print(
+                        f"{name:<12} {table:<20} {result['median_ms']:>10.2f} "
+                        f"{result['max_ms']:>8.2f} {result['buffers']:>8}  "
+                        f"{', '.join(result['relations'])}"
+                    )
+        finally:
+            conn.rollback()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
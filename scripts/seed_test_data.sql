@@ -14,4 +14,12 @@ INSERT INTO regions (id, name) VALUES
 (1, 'Singapore');
 
 INSERT INTO product_pricings (id, product_id, rental_period_id, region_id, price) VALUES
-(1, 1, 1, 1, 100.0);
\ No newline at end of file
+(1, 1, 1, 1, 100.0);
+
+-- Move the ID sequences past the explicit IDs above
+SELECT setval('products_id_seq', (SELECT max(id) FROM products));
+SELECT setval('attributes_id_seq', (SELECT max(id) FROM attributes));
+SELECT setval('attribute_values_id_seq', (SELECT max(id) FROM attribute_values));
+SELECT setval('rental_periods_id_seq', (SELECT max(id) FROM rental_periods));
+SELECT setval('regions_id_seq', (SELECT max(id) FROM regions));
+SELECT setval('product_pricings_id_seq', (SELECT max(id) FROM product_pricings));